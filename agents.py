@@ -1,53 +1,114 @@
 import random
 
+import numpy as np
+
 class Agent:
+    __slots__ = ('x', 'y', 'uid')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
 
-    def move(self, grid_size):
-        dx, dy = random.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
-        self.x = (self.x + dx) % grid_size
-        self.y = (self.y + dy) % grid_size
+    def move(self, grid_size, rng=random, occupancy=None, direction=None):
+        """Step to an adjacent cell, random unless a (dx, dy) direction is given
+
+        With an occupancy grid, a taken cell blocks the move.
+        """
+        dx, dy = direction or rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+        x = (self.x + dx) % grid_size
+        y = (self.y + dy) % grid_size
+        if occupancy is not None and not occupancy.move(self.x, self.y, x, y):
+            return False
+        self.x, self.y = x, y
+        return True
+
+    def birth_cell(self, occupancy, rng=random):
+        """Random free cell next to this agent for a newborn, or None when boxed in"""
+        if occupancy is None:
+            return self.x, self.y
+        free = occupancy.free_neighbours(self.x, self.y)
+        return rng.choice(free) if free else None
+
+
+class AgentPool:
+    """Free list of dead agents of one class, reused for newborns instead of allocating"""
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+
+    def acquire(self, x, y, energy):
+        if self.free:
+            agent = self.free.pop()
+            agent.reset(x, y, energy)
+            return agent
+        return self.cls(x, y, energy)
+
+    def release(self, agent):
+        self.free.append(agent)
+
+    def release_many(self, agents):
+        self.free.extend(agents)
+
+    def __len__(self):
+        return len(self.free)
 
 
 class Prey(Agent):
-    def __init__(self, x, y, energy=None):
-        super().__init__(x, y)
-        self.steps_since_reproduce = 0
+    __slots__ = ('energy', 'steps_since_reproduce')
+
+    # Species constants, shared by every prey and read by every engine
+    max_energy = 30              # Maximum energy capacity
+    energy_gain_from_food = 5    # Energy from a food source
+    energy_loss_per_step = 1
+    min_reproduce_energy = 15
+    reproduction_cost = 8        # Energy handed to the child
+    natural_food_chance = 0.3    # Chance to forage without a food source
+    natural_food_energy = 2
+    initial_energy = (15, 25)    # Range of a new world's random starting energies, both ends included
+
+    def __init__(self, x, y, energy=None, rng=random):
         # Add energy system to prey
-        self.energy = energy if energy is not None else random.randint(15, 25)  # Random starting energy
-        self.max_energy = 30  # Maximum energy capacity
+        self.reset(x, y, energy if energy is not None else rng.randint(*self.initial_energy))
 
-    def step(self, grid_size, reproduce_interval, occupied_positions, food_positions=None, energy_gain_from_food=5, energy_loss_per_step=1, min_reproduce_energy=15):
-        # Move first
-        self.move(grid_size)
+    def reset(self, x, y, energy):
+        self.x = x
+        self.y = y
+        self.energy = energy
+        self.steps_since_reproduce = 0
+
+    def step(self, grid_size, reproduce_interval, occupancy=None, food_positions=None, rng=random, pool=None, predators=None):
+        # Move first, fleeing down the sensed predator density if given (stays put if the cell is taken)
+        self.move(grid_size, rng, occupancy, predators.downhill(self.x, self.y) if predators is not None else None)
         
         # Consume energy for movement
-        self.energy -= energy_loss_per_step
+        self.energy -= self.energy_loss_per_step
         
         # Look for food (could be vegetation/plankton positions)
-        if food_positions and (self.x, self.y) in food_positions:
-            self.energy = min(self.max_energy, self.energy + energy_gain_from_food)
+        if food_positions is not None and (self.x, self.y) in food_positions:
+            self.energy = min(self.max_energy, self.energy + self.energy_gain_from_food)
         else:
             # Natural foraging - prey can find some food even without specific food positions
-            if random.random() < 0.3:  # 30% chance to find natural food
-                self.energy = min(self.max_energy, self.energy + 2)
+            if rng.random() < self.natural_food_chance:
+                self.energy = min(self.max_energy, self.energy + self.natural_food_energy)
         
         self.steps_since_reproduce += 1
         
-        # Check reproduction conditions: time interval, energy, and space
+        # Check reproduction conditions: time interval and energy
+        reproduction_cost = self.reproduction_cost
         if (self.steps_since_reproduce >= reproduce_interval and 
-            self.energy >= min_reproduce_energy and 
-            (self.x, self.y) not in occupied_positions):
+            self.energy >= self.min_reproduce_energy and 
+            self.energy >= reproduction_cost * 2):  # Need enough energy for both parent and child
             
-            # Reproduction costs energy
-            reproduction_cost = 8
-            if self.energy >= reproduction_cost * 2:  # Need enough energy for both parent and child
+            # The child needs a free cell next to its parent
+            cell = self.birth_cell(occupancy, rng)
+            if cell is not None:
+                # Reproduction costs energy
                 self.energy -= reproduction_cost
                 child_energy = reproduction_cost
                 self.steps_since_reproduce = 0
-                return Prey(self.x, self.y, child_energy)
+                if pool is not None:
+                    return pool.acquire(cell[0], cell[1], child_energy)
+                return Prey(cell[0], cell[1], child_energy)
         
         return None
     
@@ -57,69 +118,114 @@ class Prey(Agent):
 
 
 class Predator(Agent):
+    __slots__ = ('energy', 'steps_since_reproduce')
+
     def __init__(self, x, y, energy):
-        super().__init__(x, y)
+        self.reset(x, y, energy)
+
+    def reset(self, x, y, energy):
+        self.x = x
+        self.y = y
         self.energy = energy
         self.steps_since_reproduce = 0
 
-    def step(self, grid_size, prey_positions, energy_gain, energy_loss, reproduce_interval, occupied_positions, min_reproduce_energy=None):
-        # Look for adjacent prey to hunt
-        targets = [(x, y) for (x, y) in prey_positions if abs(x - self.x) + abs(y - self.y) == 1]
+    def step(self, grid_size, occupancy, agents, energy_gain, energy_loss, reproduce_interval, min_reproduce_energy=None, rng=random, pool=None, counters=None, prey_field=None):
+        """One predator step; returns (child or None, eaten prey or None)
+
+        agents maps the ids in the occupancy grid to agent objects. The
+        eaten prey's cell is taken over here; removing the prey itself is
+        left to the caller. counters, if given, tallies the target scan.
+        With a prey DensityField, a predator with no prey next to it
+        chases up the sensed prey density instead of wandering.
+        """
+        # Look for adjacent prey to hunt (O(1) lookup of the four toroidal neighbours)
+        targets = [(x, y) for x, y in occupancy.neighbours(self.x, self.y)
+                   if isinstance(agents.get(occupancy.occupant(x, y)), Prey)]
+        if counters is not None:
+            counters['target_scans'] += 1
+            counters['targets_found'] += len(targets)
+        eaten = None
         if targets:
             # Move to prey position (hunting)
-            self.x, self.y = random.choice(targets)
+            x, y = rng.choice(targets)
+            eaten = agents[occupancy.occupant(x, y)]
+            occupancy.vacate(x, y)
+            occupancy.move(self.x, self.y, x, y)
+            self.x, self.y = x, y
         else:
-            # Regular movement when no prey nearby
-            self.move(grid_size)
+            # Chase sensed prey, or wander when none are in range (stays put if the chosen cell is taken)
+            self.move(grid_size, rng, occupancy, prey_field.uphill(self.x, self.y) if prey_field is not None else None)
 
         # Energy management
         self.energy -= energy_loss
         self.steps_since_reproduce += 1
-        ate_prey = (self.x, self.y) in prey_positions
         
-        if ate_prey:
+        if eaten is not None:
             self.energy += energy_gain
 
         # Reproduction logic
         min_energy_for_reproduction = min_reproduce_energy if min_reproduce_energy else energy_loss * 10
         
         if (self.steps_since_reproduce >= reproduce_interval and 
-            self.energy > min_energy_for_reproduction and 
-            (self.x, self.y) not in occupied_positions):
+            self.energy > min_energy_for_reproduction):
             
-            # Split energy between parent and child
-            child_energy = self.energy // 2
-            self.energy = self.energy // 2
-            self.steps_since_reproduce = 0
-            return Predator(self.x, self.y, child_energy), ate_prey
+            # The child needs a free cell next to its parent
+            cell = self.birth_cell(occupancy, rng)
+            if cell is not None:
+                # Split energy between parent and child
+                child_energy = self.energy // 2
+                self.energy = self.energy // 2
+                self.steps_since_reproduce = 0
+                if pool is not None:
+                    return pool.acquire(cell[0], cell[1], child_energy), eaten
+                return Predator(cell[0], cell[1], child_energy), eaten
             
-        return None, ate_prey
+        return None, eaten
     
     def is_alive(self):
         """Check if predator is still alive (has energy)"""
         return self.energy > 0
 
 
-class Food:
-    """Represents food sources (vegetation/plankton) that prey can consume"""
-    def __init__(self, x, y, regeneration_time=10):
-        self.x = x
-        self.y = y
-        self.available = True
-        self.regeneration_time = regeneration_time
-        self.time_until_regen = 0
-    
-    def consume(self):
-        """Consume this food source"""
-        if self.available:
-            self.available = False
-            self.time_until_regen = self.regeneration_time
+class FoodField:
+    """Grid-indexed food sources: one availability flag and regeneration countdown per cell"""
+
+    regeneration_time = 10  # Steps until an eaten food source is available again, read by every engine
+
+    def __init__(self, grid_size, xs=(), ys=(), regeneration_time=None):
+        self.grid_size = grid_size
+        if regeneration_time is not None:
+            self.regeneration_time = regeneration_time
+        # Several placements on the same cell collapse into a single food source
+        self.present = np.zeros((grid_size, grid_size), dtype=bool)
+        self.present[np.asarray(ys, dtype=np.int64), np.asarray(xs, dtype=np.int64)] = True
+        self.time_until_regen = np.zeros((grid_size, grid_size), dtype=np.int64)  # 0 = available
+
+    def step(self):
+        """Update food regeneration on every cell at once"""
+        np.subtract(self.time_until_regen, 1, out=self.time_until_regen, where=self.time_until_regen > 0)
+
+    def available(self):
+        """Boolean grid of cells whose food can be eaten right now"""
+        return self.present & (self.time_until_regen == 0)
+
+    def available_count(self):
+        return int(np.count_nonzero(self.available()))
+
+    def consume(self, x, y):
+        """Consume the food source at (x, y), if there is one available"""
+        if self.present[y, x] and self.time_until_regen[y, x] == 0:
+            self.time_until_regen[y, x] = self.regeneration_time
             return True
         return False
-    
-    def step(self):
-        """Update food regeneration"""
-        if not self.available:
-            self.time_until_regen -= 1
-            if self.time_until_regen <= 0:
-                self.available = True
\ No newline at end of file
+
+    def consume_many(self, xs, ys):
+        """Vectorized consume for arrays of positions; returns which of them found food"""
+        eaten = self.available()[ys, xs]
+        self.time_until_regen[ys[eaten], xs[eaten]] = self.regeneration_time
+        return eaten
+
+    def __contains__(self, position):
+        """Whether there is available food at (x, y)"""
+        x, y = position
+        return bool(self.present[y, x]) and self.time_until_regen[y, x] == 0
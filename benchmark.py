@@ -0,0 +1,217 @@
+"""Step-time benchmark for the simulation engines
+
+Runs the step loop headlessly over a range of grid sizes, populations and
+food densities and writes steps/sec, per-phase time, garbage collector
+runs and peak memory to a JSON file, so results can be compared across commits:
+
+    py benchmark.py --engines object numpy --grid-sizes 50 100 200 --output bench.json
+
+With --startup it instead measures cold-start import time of the entry
+modules, each in a fresh interpreter, and which graphical packages they
+pull in:
+
+    py benchmark.py --startup --output startup.json
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from headless import DEFAULT_PARAMS
+from world import create_world
+
+# Entry modules timed by --startup, and the packages a headless import must not load
+STARTUP_MODULES = ('gui', 'headless', 'sweep', 'cache', 'simulation', 'viewer')
+GRAPHICAL_PACKAGES = ('matplotlib', 'tkinter', 'PIL')
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+graphical = [name for name in {graphical!r} if name in sys.modules]
+print(json.dumps({{'seconds': seconds, 'modules': len(sys.modules), 'graphical': graphical}}))
+"""
+
+# Initial agents per cell, taken from the GUI defaults (250 prey and 100 predators on 50x50)
+PREY_PER_CELL = DEFAULT_PARAMS['initial_prey'] / DEFAULT_PARAMS['grid_size'] ** 2
+PREDATORS_PER_CELL = DEFAULT_PARAMS['initial_predators'] / DEFAULT_PARAMS['grid_size'] ** 2
+
+
+def benchmark_case(params, engine, steps, seed=0, measure_memory=True):
+    """Time ``steps`` steps of one configuration, phase by phase"""
+    if steps < 1:
+        raise ValueError(f"steps must be at least 1, got {steps}")
+    world = create_world(engine, seed=seed, **params)
+    phase_times = {name: 0.0 for name, _ in world.phases}
+    phase_times['stats'] = 0.0
+
+    steps_run = 0
+    collections_before = gc_collections()
+    start = time.perf_counter()
+    try:
+        for _ in range(steps):
+            for name, phase in world.phases:
+                phase_start = time.perf_counter()
+                phase()
+                phase_times[name] += time.perf_counter() - phase_start
+            stats_start = time.perf_counter()
+            stats = world.stats()
+            phase_times['stats'] += time.perf_counter() - stats_start
+            steps_run += 1
+            if not stats['prey_count'] or not stats['predator_count']:
+                break
+        elapsed = time.perf_counter() - start
+    finally:
+        world.close()
+    collections = gc_collections() - collections_before
+
+    case = {
+        'engine': engine,
+        'params': params,
+        'seed': seed,
+        'steps': steps_run,
+        'seconds': elapsed,
+        'steps_per_sec': steps_run / elapsed if elapsed else 0.0,
+        'phase_seconds_per_step': {name: total / steps_run for name, total in phase_times.items()},
+        'gc_collections': collections,
+        'final_prey': stats['prey_count'],
+        'final_predators': stats['predator_count'],
+    }
+    if measure_memory:
+        # Separate pass: tracemalloc slows Python code down too much to time under it
+        case['peak_memory_bytes'] = peak_memory(params, engine, steps_run, seed)
+    return case
+
+
+def gc_collections():
+    """Garbage collector runs so far, summed over all generations"""
+    return sum(generation['collections'] for generation in gc.get_stats())
+
+
+def peak_memory(params, engine, steps, seed=0):
+    """Peak traced allocation while building the world and running ``steps`` steps"""
+    tracemalloc.start()
+    try:
+        world = create_world(engine, seed=seed, **params)
+        try:
+            for _ in range(steps):
+                world.step()
+                world.stats()
+        finally:
+            world.close()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def startup_case(module, repeats=5):
+    """Import ``module`` in ``repeats`` fresh interpreters; keeps the fastest run"""
+    script = STARTUP_SCRIPT.format(module=module, graphical=GRAPHICAL_PACKAGES)
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+        run = json.loads(output.splitlines()[-1])
+        run['process_seconds'] = time.perf_counter() - start
+        runs.append(run)
+    best = min(runs, key=lambda run: run['seconds'])
+    return {
+        'module': module,
+        'import_seconds': best['seconds'],
+        'process_seconds': min(run['process_seconds'] for run in runs),
+        'modules_loaded': best['modules'],
+        'graphical_packages': best['graphical'],
+    }
+
+
+def run_startup(modules=STARTUP_MODULES, repeats=5):
+    cases = []
+    for module in modules:
+        case = startup_case(module, repeats)
+        graphical = ', '.join(case['graphical_packages']) or '-'
+        print(f"{module:>10} {case['import_seconds'] * 1000:8.1f} ms impor "
+              f"{case['process_seconds'] * 1000:8.1f} ms total  grafis: {graphical}")
+        cases.append(case)
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'startup': cases,
+    }
+
+
+def scaling_params(grid_size, food_density, population_scale=1.0):
+    """Default parameters on a grid_size x grid_size world, with populations scaled to its area"""
+    params = {name: value for name, value in DEFAULT_PARAMS.items() if name not in ('max_steps', 'engine')}
+    cells = grid_size * grid_size
+    params.update(
+        grid_size=grid_size,
+        food_density=food_density,
+        initial_prey=max(1, int(cells * PREY_PER_CELL * population_scale)),
+        initial_predators=max(1, int(cells * PREDATORS_PER_CELL * population_scale)),
+    )
+    return params
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(engines, grid_sizes, food_densities, population_scales, steps, seed=0, measure_memory=True):
+    cases = []
+    for engine in engines:
+        for grid_size in grid_sizes:
+            for food_density in food_densities:
+                for population_scale in population_scales:
+                    params = scaling_params(grid_size, food_density, population_scale)
+                    case = benchmark_case(params, engine, steps, seed, measure_memory)
+                    print(f"{engine:>6} grid={grid_size:<5} food={food_density:<4} "
+                          f"prey={params['initial_prey']:<7} predators={params['initial_predators']:<7} "
+                          f"{case['steps_per_sec']:10.2f} langkah/detik")
+                    cases.append(case)
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cases': cases,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulation step loop")
+    parser.add_argument('--engines', nargs='+', default=['object', 'numpy'])
+    parser.add_argument('--grid-sizes', nargs='+', type=int, default=[50, 100, 200, 500, 1000])
+    parser.add_argument('--food-densities', nargs='+', type=float, default=[0.1, 0.5])
+    parser.add_argument('--population-scales', nargs='+', type=float, default=[1.0],
+                        help="multiplier on the default prey/predator density")
+    parser.add_argument('--steps', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help="skip the peak-memory pass")
+    parser.add_argument('--startup', action='store_true',
+                        help="time cold-start imports of the entry modules instead of the step loop")
+    parser.add_argument('--repeats', type=int, default=5, help="fresh interpreters per module with --startup")
+    parser.add_argument('--output', default='bench.json')
+    args = parser.parse_args()
+    if args.steps < 1:
+        parser.error(f"--steps must be at least 1, got {args.steps}")
+
+    if args.startup:
+        report = run_startup(repeats=args.repeats)
+    else:
+        report = run_benchmarks(args.engines, args.grid_sizes, args.food_densities, args.population_scales,
+                                args.steps, args.seed, not args.no_memory)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Hasil benchmark disimpan ke {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import numbers
+import os
+
+import numpy as np
+
+from convergence import ConvergenceDetector
+from headless import DEFAULT_PARAMS, SERIES, Result, run_simulation
+from world import ENGINE_VERSION
+
+
+def _plain(value):
+    """JSON fallback for NumPy scalars in parameter dicts"""
+    return value.item()
+
+
+class ResultCache:
+    """Content-addressed on-disk cache of headless results
+
+    Entries are keyed by the SHA-256 of the full parameter set (defaults
+    filled in), the seed, the convergence settings and ENGINE_VERSION, so
+    a changed engine never serves stale results; runs forked from a
+    checkpoint also key on its content digest. Each entry is an .npz of
+    the run's series, optionally with its trajectory file next to it. Once
+    the directory grows past max_bytes, the least recently used entries
+    are evicted. Runs without an integer seed are not reproducible and are
+    never cached.
+    """
+
+    def __init__(self, directory='.cache', max_bytes=1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, params=None, seed=None, convergence=None, checkpoint=None):
+        description = {
+            'params': {**DEFAULT_PARAMS, **(params or {})},
+            'seed': seed,
+            'convergence': convergence,
+            'engine_version': ENGINE_VERSION,
+        }
+        if checkpoint is not None:
+            description['checkpoint'] = checkpoint.digest
+        return hashlib.sha256(json.dumps(description, sort_keys=True, default=_plain).encode()).hexdigest()
+
+    def _path(self, key, suffix='.npz'):
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, params=None, seed=None, convergence=None, checkpoint=None):
+        """Cached Result for this configuration, or None on a miss"""
+        path = self._path(self.key(params, seed, convergence, checkpoint))
+        try:
+            with np.load(path) as data:
+                columns = {name: data[name] for name in SERIES}
+                meta = json.loads(str(data['meta']))
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            return None
+        return Result(meta['params'], meta['seed'], columns, meta['regime'], meta['period'],
+                      start_step=meta.get('start_step', 0))
+
+    def trajectory_path(self, params=None, seed=None, convergence=None, checkpoint=None):
+        """Path of the cached trajectory for this configuration, or None if it has none"""
+        key = self.key(params, seed, convergence, checkpoint)
+        path = self._path(key, '.traj')
+        if not os.path.exists(path):
+            return None
+        os.utime(self._path(key))
+        return path
+
+    def run(self, params=None, seed=None, convergence=None, trajectory=False, checkpoint=None):
+        """run_simulation through the cache
+
+        convergence is a dict of ConvergenceDetector settings, as in
+        run_sweep. With trajectory=True the entry also keeps the run's
+        trajectory file (see trajectory_path), re-simulating once if the
+        cached entry was stored without one. checkpoint is passed on to
+        run_simulation, to fork the run from a saved world.
+        """
+        if not isinstance(seed, numbers.Integral):
+            return run_simulation(params, seed, convergence=self._detector(convergence), checkpoint=checkpoint)
+        seed = int(seed)
+
+        result = self.get(params, seed, convergence, checkpoint)
+        if result is not None and (not trajectory or self.trajectory_path(params, seed, convergence, checkpoint)):
+            return result
+
+        key = self.key(params, seed, convergence, checkpoint)
+        partial = self._path(key, f'.{os.getpid()}.tmp')
+        result = run_simulation(params, seed, convergence=self._detector(convergence),
+                                trajectory_path=partial + '.traj' if trajectory else None, checkpoint=checkpoint)
+        if trajectory:
+            # Index first, so a visible trajectory always has its index
+            os.replace(partial + '.traj.idx', self._path(key, '.traj.idx'))
+            os.replace(partial + '.traj', self._path(key, '.traj'))
+        self._store(key, result, partial)
+        self.evict()
+        return result
+
+    def _detector(self, convergence):
+        return ConvergenceDetector(**convergence) if convergence is not None else None
+
+    def _store(self, key, result, partial):
+        meta = {'params': result.params, 'seed': result.seed, 'regime': result.regime, 'period': result.period,
+                'start_step': int(result.steps[0])}
+        # Write under a temporary name, then rename: concurrent sweep workers never see half an entry
+        with open(partial, 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(meta, default=_plain)),
+                     **{name: getattr(result, name) for name in SERIES})
+        os.replace(partial, self._path(key))
+
+    def _entries(self):
+        """(last use, total bytes, files) per cached entry"""
+        entries = {}
+        for entry in os.scandir(self.directory):
+            if '.tmp' in entry.name or not entry.is_file():
+                continue
+            key = entry.name.split('.', 1)[0]
+            stat = entry.stat()
+            last_use, size, files = entries.get(key, (0.0, 0, []))
+            if entry.name.endswith('.npz'):
+                last_use = stat.st_mtime
+            entries[key] = (last_use, size + stat.st_size, files + [entry.path])
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries().values())
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = sorted(self._entries().values())
+        total = sum(size for _, size, _ in entries)
+        for _, size, files in entries:
+            if total <= self.max_bytes:
+                break
+            for path in files:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass  # Already evicted by another process
+            total -= size
+
+    def clear(self):
+        for _, _, files in self._entries().values():
+            for path in files:
+                os.remove(path)
+
+    def __len__(self):
+        return sum(1 for entry in os.scandir(self.directory) if entry.name.endswith('.npz'))
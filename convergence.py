@@ -0,0 +1,114 @@
+import numpy as np
+
+EXTINCTION = 'extinction'
+EQUILIBRIUM = 'equilibrium'
+PERIODIC = 'periodic'
+
+# Populations watched by the detector, as stats() keys
+WATCHED = ('prey_count', 'predator_count')
+
+
+def autocorrelation(x):
+    """Normalized (unbiased) autocorrelation of a series for lags 0..len(x)-1, via FFT"""
+    n = len(x)
+    x = np.asarray(x, dtype=float) - np.mean(x)
+    spectrum = np.fft.rfft(x, 2 * n)
+    acf = np.fft.irfft(spectrum * np.conj(spectrum), 2 * n)[:n] / np.arange(n, 0, -1)
+    return acf / acf[0] if acf[0] > 0 else np.zeros(n)
+
+
+def estimate_period(acf, max_period=None):
+    """Lag of the first positive autocorrelation peak after the first zero crossing, with its height
+
+    Returns (None, 0.0) when there is no such peak within max_period lags.
+    """
+    max_period = max_period or len(acf) - 1
+    below = np.flatnonzero(acf[:max_period + 1] < 0)
+    if not len(below):
+        return None, 0.0
+    above = np.flatnonzero(acf[below[0]:max_period + 1] > 0)
+    if not len(above):
+        return None, 0.0
+    # The positive lobe that follows, up to where it drops below zero again
+    lobe_start = int(below[0] + above[0])
+    lobe_end = np.flatnonzero(acf[lobe_start:] < 0)
+    lobe_end = lobe_start + int(lobe_end[0]) if len(lobe_end) else len(acf)
+    lag = lobe_start + int(np.argmax(acf[lobe_start:lobe_end]))
+    if lag > max_period:
+        return None, 0.0  # Still rising past max_period: a slow trend rather than a cycle
+    return lag, float(acf[lag])
+
+
+class ConvergenceDetector:
+    """Decides from the rolling population series when a run has settled
+
+    Feed it every step's stats with ``update``; it returns the regime once
+    one is detected, and None until then:
+
+    - extinction: prey or predators died out
+    - periodic: the populations' mean autocorrelation over the last
+      ``window`` steps has a peak of at least ``acf_threshold``, at a lag
+      that fits ``cycles`` times into the window; that lag is reported as
+      ``period``
+    - equilibrium: no such cycle, both populations fluctuate by less than
+      ``cv_threshold`` (coefficient of variation) over the window, and
+      their means drift by less than ``drift_threshold`` between its halves
+
+    The window statistics are only computed every ``check_interval`` steps
+    and never before ``min_steps``, which skips the initial transient.
+    """
+
+    def __init__(self, window=300, min_steps=None, check_interval=25, cv_threshold=0.15,
+                 drift_threshold=0.05, acf_threshold=0.5, cycles=3):
+        self.window = window
+        self.min_steps = window if min_steps is None else max(min_steps, window)
+        self.check_interval = check_interval
+        self.cv_threshold = cv_threshold
+        self.drift_threshold = drift_threshold
+        self.acf_threshold = acf_threshold
+        self.cycles = cycles
+
+        self.values = np.zeros((len(WATCHED), window))  # Ring buffer of the watched series
+        self.steps_seen = 0
+        self.regime = None
+        self.period = None
+        self.step = None  # Step at which the regime was detected
+
+    def update(self, stats):
+        """Record one step's stats; returns the detected regime, or None while undecided"""
+        if self.regime is not None:
+            return self.regime
+        step = self.steps_seen
+        self.values[:, step % self.window] = [stats[name] for name in WATCHED]
+        self.steps_seen += 1
+
+        if not all(stats[name] for name in WATCHED):
+            return self._settle(EXTINCTION, step)
+        if self.steps_seen < self.min_steps or (self.steps_seen - self.min_steps) % self.check_interval:
+            return None
+
+        # Oldest first
+        series = np.roll(self.values, -(self.steps_seen % self.window), axis=1)
+        acf = np.mean([autocorrelation(values) for values in series], axis=0)
+        period, strength = estimate_period(acf, max_period=self.window // self.cycles)
+        if period is not None and strength >= self.acf_threshold:
+            self.period = period
+            return self._settle(PERIODIC, step)
+        if self._is_equilibrium(series):
+            return self._settle(EQUILIBRIUM, step)
+        return None
+
+    def _is_equilibrium(self, series):
+        half = self.window // 2
+        for values in series:
+            mean = values.mean()
+            if values.std() > self.cv_threshold * mean:
+                return False
+            if abs(values[:half].mean() - values[half:].mean()) > self.drift_threshold * mean:
+                return False
+        return True
+
+    def _settle(self, regime, step):
+        self.regime = regime
+        self.step = step
+        return regime
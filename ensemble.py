@@ -0,0 +1,261 @@
+import logging
+import time
+
+import numpy as np
+
+from agents import FoodField
+from headless import DEFAULT_PARAMS, Result
+from history import SERIES, SERIES_DTYPES, History
+from numpy_world import BatchedWorld, initial_prey_energy, random_cells
+from rng import numpy_generator
+from spatial import EMPTY
+
+logger = logging.getLogger(__name__)
+
+
+class EnsembleWorld(BatchedWorld):
+    """Many independent worlds stepped together, with NumpyWorld's rules (BatchedWorld)
+
+    Every agent array carries a replicate index (``prey_r``,
+    ``predator_r``) and the occupancy, claim and food grids have a leading
+    replicate axis, so each phase runs once for the whole ensemble instead
+    of once per world. Replicates never interact: every lookup goes through
+    (replicate, y, x). They share one random stream, so an ensemble is
+    reproducible for a given seed and replicate count, but replicate r does
+    not match a NumpyWorld run with any particular seed.
+
+    perception_radius works as in NumpyWorld, sensing within each
+    replicate. ``stats()`` returns one value per replicate for each
+    statistic, and ``frame(r)`` the frame of a single replicate for
+    History or a viewer.
+    """
+
+    def __init__(self, replicates, grid_size, initial_prey, initial_predators, prey_reproduce_interval,
+                 predator_reproduce_interval, predator_initial_energy, energy_gain,
+                 energy_loss, food_density=0.1, seed=None, perception_radius=0):
+        self.replicates = replicates
+        self.grid_size = grid_size
+        self.perception_radius = perception_radius
+        self.prey_reproduce_interval = prey_reproduce_interval
+        self.predator_reproduce_interval = predator_reproduce_interval
+        self.energy_gain = energy_gain
+        self.energy_loss = energy_loss
+        self.rng = numpy_generator(seed)
+        rng = self.rng
+
+        # Create initial populations, one agent per cell within each replicate
+        cells = np.stack([random_cells(rng, grid_size, initial_prey + initial_predators) for _ in range(replicates)])
+        prey_cells, predator_cells = cells[:, :initial_prey].ravel(), cells[:, initial_prey:].ravel()
+        self.prey_r = np.repeat(np.arange(replicates), initial_prey)
+        self.prey_x, self.prey_y = prey_cells % grid_size, prey_cells // grid_size
+        self.prey_energy = initial_prey_energy(rng, len(prey_cells))
+        self.prey_ssr = np.zeros(len(prey_cells), dtype=np.int64)
+
+        self.predator_r = np.repeat(np.arange(replicates), initial_predators)
+        self.predator_x, self.predator_y = predator_cells % grid_size, predator_cells // grid_size
+        self.predator_energy = np.full(len(predator_cells), predator_initial_energy, dtype=np.int64)
+        self.predator_ssr = np.zeros(len(predator_cells), dtype=np.int64)
+
+        # Occupancy grids of agent ids; ids are unique across the whole ensemble
+        shape = (replicates, grid_size, grid_size)
+        self.ids = np.full(shape, EMPTY, dtype=np.int64)
+        self.next_id = 0
+        self.prey_id = self._new_ids(len(prey_cells))
+        self.predator_id = self._new_ids(len(predator_cells))
+        self.ids[self.prey_r, self.prey_y, self.prey_x] = self.prey_id
+        self.ids[self.predator_r, self.predator_y, self.predator_x] = self.predator_id
+        self._claims = np.empty(shape, dtype=np.int64)  # Scratch grids for _claim
+
+        # Event counters, switched on by instrumentation.Instrumentation (None = no counting)
+        self.counters = None
+
+        # Create food sources, indexed by replicate and cell
+        num_food = int(grid_size * grid_size * food_density)
+        self.food_present = np.zeros(shape, dtype=bool)
+        self.food_present[np.repeat(np.arange(replicates), num_food),
+                          rng.integers(grid_size, size=replicates * num_food),
+                          rng.integers(grid_size, size=replicates * num_food)] = True
+        self.food_timer = np.zeros(shape, dtype=np.int64)  # 0 = available
+
+        # Same phases as NumpyWorld, so tools can time them individually
+        self.phases = [
+            ('food_regen', self._regenerate_food),
+            ('prey_pass', self._prey_pass),
+            ('food_consumption', self._consume_food),
+            ('predator_pass', self._predator_pass),
+        ]
+
+    def food_available(self):
+        return self.food_present & (self.food_timer == 0)
+
+    def _regenerate_food(self):
+        np.subtract(self.food_timer, 1, out=self.food_timer, where=self.food_timer > 0)
+        self._food_available = self.food_available()
+
+    def _consume_food(self):
+        # Consume food where prey are located
+        cell = self.prey_r, self.prey_y, self.prey_x
+        eaten = self.food_available()[cell]
+        self.food_timer[tuple(axis[eaten] for axis in cell)] = FoodField.regeneration_time
+        if self.counters is not None:
+            self.counters['food_consumed'] += int(np.count_nonzero(eaten))
+
+    def retire(self, ended):
+        """Remove every agent of the replicates in the boolean mask ``ended``
+
+        run_ensemble retires a replicate once it has lost a species, so
+        the surviving species of a finished run costs nothing to step.
+        """
+        prey = ended[self.prey_r]
+        self.ids[self.prey_r[prey], self.prey_y[prey], self.prey_x[prey]] = EMPTY
+        keep = ~prey
+        self.prey_r, self.prey_x, self.prey_y = self.prey_r[keep], self.prey_x[keep], self.prey_y[keep]
+        self.prey_energy, self.prey_ssr, self.prey_id = self.prey_energy[keep], self.prey_ssr[keep], self.prey_id[keep]
+
+        predators = ended[self.predator_r]
+        self.ids[self.predator_r[predators], self.predator_y[predators], self.predator_x[predators]] = EMPTY
+        keep = ~predators
+        self.predator_r, self.predator_x, self.predator_y = (self.predator_r[keep], self.predator_x[keep],
+                                                             self.predator_y[keep])
+        self.predator_energy, self.predator_ssr, self.predator_id = (self.predator_energy[keep],
+                                                                     self.predator_ssr[keep], self.predator_id[keep])
+
+    def stats(self):
+        """Same keys as NumpyWorld.stats(), each an array with one value per replicate"""
+        R = self.replicates
+        prey_count = np.bincount(self.prey_r, minlength=R)
+        predator_count = np.bincount(self.predator_r, minlength=R)
+        prey_energy = np.bincount(self.prey_r, weights=self.prey_energy, minlength=R)
+        predator_energy = np.bincount(self.predator_r, weights=self.predator_energy, minlength=R)
+        return {
+            'prey_count': prey_count,
+            'predator_count': predator_count,
+            'avg_prey_energy': np.divide(prey_energy, prey_count, out=np.zeros(R), where=prey_count > 0),
+            'avg_predator_energy': np.divide(predator_energy, predator_count, out=np.zeros(R),
+                                             where=predator_count > 0),
+            'available_food': np.count_nonzero(self.food_available(), axis=(1, 2)),
+        }
+
+    def frame(self, replicate=0):
+        """NumpyWorld-style frame of one replicate, for History.append"""
+        prey = self.prey_r == replicate
+        predators = self.predator_r == replicate
+        return (self.prey_x[prey], self.prey_y[prey], self.prey_energy[prey],
+                self.predator_x[predators], self.predator_y[predators], self.predator_energy[predators],
+                self.food_available()[replicate])
+
+
+class EnsembleResult:
+    """Time series of every replicate of an ensemble run, plus ensemble summaries
+
+    Each statistic is a (steps, replicates) array attribute, the 2-D
+    counterpart of Result's series. ``extinction_step`` holds the step at
+    which each replicate lost a species (-1 if it never did). A single run
+    stops there, so an extinct replicate's series hold their values from
+    that step on: bands and means describe runs that end at extinction,
+    not the one-species dynamics after it. ``history`` is the recorded
+    History of one replicate, when run_ensemble was asked to keep one.
+    """
+    def __init__(self, params, seed, columns, extinction_step, history=None):
+        self.params = params
+        self.seed = seed
+        for name in SERIES:
+            setattr(self, name, np.array(columns[name]))
+        self.steps = np.arange(len(self.prey_count))
+        self.extinction_step = np.asarray(extinction_step)
+        self.history = history
+
+    def __len__(self):
+        return len(self.steps)
+
+    @property
+    def replicates(self):
+        return self.prey_count.shape[1]
+
+    @property
+    def extinct(self):
+        """Whether each replicate lost its prey or its predators"""
+        return self.extinction_step >= 0
+
+    def replicate(self, r):
+        """One replicate as a headless Result, ending at its extinction step like a single run"""
+        end = self.extinction_step[r] + 1 if self.extinct[r] else len(self)
+        columns = {name: getattr(self, name)[:end, r] for name in SERIES}
+        return Result(self.params, self.seed, columns, 'extinction' if self.extinct[r] else None)
+
+    def mean(self, name):
+        return getattr(self, name).mean(axis=1)
+
+    def percentile(self, name, q):
+        return np.percentile(getattr(self, name), q, axis=1)
+
+    def band(self, name, low=5, high=95):
+        """(lower percentile, mean, upper percentile) series of one statistic across replicates"""
+        lower, upper = self.percentile(name, [low, high])
+        return lower, self.mean(name), upper
+
+    def summary(self, low=5, high=95):
+        """Extinction rate and the final-step mean and percentile range of every statistic"""
+        summary = {'replicates': self.replicates, 'steps': len(self) - 1,
+                   'extinct_fraction': float(self.extinct.mean())}
+        for name in SERIES:
+            final = getattr(self, name)[-1]
+            summary[name] = {'mean': float(final.mean()),
+                             f'p{low}': float(np.percentile(final, low)),
+                             f'p{high}': float(np.percentile(final, high))}
+        return summary
+
+
+def run_ensemble(params=None, replicates=32, seed=None, log_interval=None, record=None):
+    """Run ``replicates`` independent simulations of one configuration in a single EnsembleWorld
+
+    params uses simulate()'s parameter names, with DEFAULT_PARAMS for
+    anything missing; 'engine' is ignored, since the ensemble always uses
+    the vectorized rules, and is reported as 'ensemble'. A replicate's
+    agents are removed as soon as it loses a species; the run stops at
+    max_steps, or earlier once every replicate has. With record=r,
+    replicate r is also kept as a History in the result, for the viewer.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {}), 'engine': 'ensemble'}
+    world_params = {name: value for name, value in params.items() if name not in ('max_steps', 'engine')}
+    world = EnsembleWorld(replicates, seed=seed, **world_params)
+
+    history = None
+    if record is not None:
+        history = History(world.grid_size, world.food_present[record])
+
+    columns = {name: np.zeros((params['max_steps'] + 1, replicates), dtype=SERIES_DTYPES[name])
+               for name in SERIES}
+    extinction_step = np.full(replicates, -1, dtype=np.int64)
+
+    def append(step, stats):
+        # Replicates that already lost a species have no agents left, their series stay as they ended
+        ended = extinction_step >= 0
+        for name in SERIES:
+            columns[name][step] = np.where(ended, columns[name][step - 1], stats[name]) if step else stats[name]
+        newly_extinct = ~ended & ((stats['prey_count'] == 0) | (stats['predator_count'] == 0))
+        extinction_step[newly_extinct] = step
+        if history is not None and not ended[record]:
+            history.append(world.frame(record), {name: stats[name][record] for name in SERIES})
+        if newly_extinct.any():
+            world.retire(newly_extinct)
+
+    append(0, world.stats())
+    last_step = 0
+    last_log = time.monotonic()
+    for step in range(1, params['max_steps'] + 1):
+        world.step()
+        append(step, world.stats())
+        last_step = step
+
+        if log_interval is not None and time.monotonic() - last_log >= log_interval:
+            last_log = time.monotonic()
+            logger.info("step %d/%d: mean prey=%.1f mean predators=%.1f extinct=%d/%d", step, params['max_steps'],
+                        columns['prey_count'][step].mean(), columns['predator_count'][step].mean(),
+                        np.count_nonzero(extinction_step >= 0), replicates)
+
+        if (extinction_step >= 0).all():
+            break
+
+    columns = {name: values[:last_step + 1] for name, values in columns.items()}
+    return EnsembleResult(params, seed, columns, extinction_step, history)
@@ -0,0 +1,161 @@
+"""Offline video/GIF export of a recorded run
+
+Renders every step of a History or trajectory file with the viewer's
+colour scheme, directly to pixel arrays, in parallel worker processes,
+and pipes the frames into an encoder: ffmpeg for video formats, Pillow
+for GIF.
+
+    py export.py run.traj run.mp4 --fps 30 --scale 2
+"""
+import argparse
+import os
+import shutil
+import subprocess
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from render import PALETTE, render_indexed
+from trajectory import Trajectory
+
+CHUNK_SIZE = 32  # Frames rendered per worker task
+
+
+class VideoEncoder:
+    """Raw RGB frames piped into an ffmpeg process, which picks the codec from the file extension"""
+
+    def __init__(self, path, size, fps):
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg was not found on PATH; install it or export to a .gif file")
+        self.process = subprocess.Popen([
+            ffmpeg, '-loglevel', 'error', '-y',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{size}x{size}', '-r', str(fps), '-i', '-',
+            # Most players only take yuv420p, which needs even dimensions
+            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p', path,
+        ], stdin=subprocess.PIPE)
+
+    def write(self, frames):
+        self.process.stdin.write(PALETTE[frames].tobytes())
+
+    def close(self):
+        self.process.stdin.close()
+        code = self.process.wait()
+        if code:
+            raise RuntimeError(f"ffmpeg failed with exit code {code}")
+
+    def abort(self):
+        self.process.kill()
+        self.process.wait()
+
+
+class GifEncoder:
+    """Palette frames collected into an animated GIF, saved by Pillow on close"""
+
+    def __init__(self, path, size, fps):
+        from PIL import Image  # Only GIF export needs Pillow
+        self.image = Image
+        self.path = path
+        self.duration = max(20, int(round(1000 / fps)))  # GIF delays are in 10 ms units, most viewers clamp below 20
+        self.palette = PALETTE.ravel().tolist()
+        self.frames = []
+
+    def write(self, frames):
+        for frame in frames:
+            image = self.image.frombytes('P', frame.shape[::-1], frame.tobytes())
+            image.putpalette(self.palette)
+            self.frames.append(image)
+
+    def close(self):
+        if not self.frames:
+            raise ValueError("No frames were written, so there is no GIF to save")
+        first, *rest = self.frames
+        first.save(self.path, save_all=True, append_images=rest, duration=self.duration, loop=0, optimize=False)
+
+    def abort(self):
+        self.frames = []
+
+
+# Trajectories opened by this worker process, by path
+_trajectories = {}
+
+
+def _render_chunk(task):
+    """Palette frames (count x size x size) of one task's steps"""
+    source, steps, scale = task
+    if isinstance(source, str):
+        if source not in _trajectories:
+            _trajectories[source] = Trajectory(source)
+        source = _trajectories[source]
+    n = source.grid_size
+    frames = np.empty((len(steps), n * scale, n * scale), dtype=np.uint8)
+    cells = np.empty((n, n), dtype=np.uint8)
+    for i, step in enumerate(steps):
+        render_indexed(n, *source.frame_at(step), out=cells)
+        frames[i] = cells if scale == 1 else cells.repeat(scale, axis=0).repeat(scale, axis=1)
+    return frames
+
+
+def _tasks(source, steps, scale):
+    """Worker tasks over chunks of steps: a trajectory is reopened by path, a History sends just the chunk"""
+    for start in range(0, len(steps), CHUNK_SIZE):
+        chunk = steps[start:start + CHUNK_SIZE]
+        if isinstance(source, Trajectory):
+            yield source.path, list(chunk), scale
+        else:
+            yield source.select(chunk), range(len(chunk)), scale
+
+
+def export(source, path, fps=30, scale=1, stride=1, max_workers=None):
+    """Write every ``stride``-th step of a run to a video (.mp4, .webm, ...) or .gif file
+
+    ``source`` is a History, a Trajectory or a trajectory file path. Each
+    cell becomes a ``scale`` x ``scale`` block of pixels. Frames are
+    rendered max_workers at a time and handed to the encoder in order;
+    only a few chunks are in flight, so a long run never sits in memory
+    as images (except for GIF, which Pillow encodes on close). Returns
+    the number of frames written.
+    """
+    if isinstance(source, str):
+        source = Trajectory(source)
+    if stride < 1:
+        raise ValueError(f"stride must be at least 1, got {stride}")
+    steps = range(0, len(source), stride)
+    if not steps:
+        raise ValueError("The run has no recorded steps to export")
+    size = source.grid_size * scale
+    encoder = (GifEncoder if path.lower().endswith('.gif') else VideoEncoder)(path, size, fps)
+    max_workers = max_workers or os.cpu_count()
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            pending = deque()
+            for task in _tasks(source, steps, scale):
+                pending.append(pool.submit(_render_chunk, task))
+                if len(pending) >= 2 * max_workers:
+                    encoder.write(pending.popleft().result())
+            while pending:
+                encoder.write(pending.popleft().result())
+    except BaseException:
+        encoder.abort()
+        raise
+    encoder.close()
+    return len(steps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a trajectory file to a video or GIF")
+    parser.add_argument('trajectory', help="trajectory file written by simulate(trajectory_path=...)")
+    parser.add_argument('output', help="output file; .gif uses Pillow, anything else ffmpeg")
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--scale', type=int, default=1, help="pixels per cell along each side")
+    parser.add_argument('--stride', type=int, default=1, help="export every n-th step")
+    parser.add_argument('--workers', type=int, default=None, help="render processes (default: all cores)")
+    args = parser.parse_args()
+    count = export(args.trajectory, args.output, fps=args.fps, scale=args.scale, stride=args.stride,
+                   max_workers=args.workers)
+    print(f"{count} frame diekspor ke {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,15 @@
 import tkinter as tk
 from tkinter import ttk
-from simulation import simulate
 
 def start_gui():
     def run_simulation():
         params = {label: int(entry.get()) for label, entry in entries.items()}
         float_params = {label: float(entry.get()) for label, entry in float_entries.items()}
         navigation_enabled = nav_var.get()
+        live_enabled = live_var.get()
         root.destroy()
+        # Imported only once the form is submitted, so the window appears without waiting for NumPy
+        from simulation import simulate
         simulate(
             grid_size=params["Ukuran Laut"],
             initial_prey=params["Banyak Mangsa di Awal"],
@@ -19,7 +21,9 @@ def start_gui():
             energy_loss=params["Energi Hilang Dalam Satu Waktu"],
             max_steps=params["Waktu Simulasi Maksimum"],
             food_density=float_params["Kepadatan Makanan (0.0-1.0)"],
-            enable_navigation=navigation_enabled
+            perception_radius=params["Jangkauan Penglihatan (sel)"],
+            enable_navigation=navigation_enabled,
+            live=live_enabled
         )
 
     def center_window(window, width=500, height=750):
@@ -134,6 +138,7 @@ def start_gui():
         "Ukuran Laut": 50,
         "Banyak Mangsa di Awal": 250,
         "Banyak Predator di Awal": 100,
+        "Jangkauan Penglihatan (sel)": 0,
         "Waktu untuk Reproduksi Mangsa": 5,
         "Waktu untuk Reproduksi Predator": 8,
         "Energi Awal Predator": 25,
@@ -152,6 +157,7 @@ def start_gui():
         "Ukuran Laut": "Ukuran grid simulasi (NxN)",
         "Banyak Mangsa di Awal": "Jumlah mangsa pada awal simulasi",
         "Banyak Predator di Awal": "Jumlah predator pada awal simulasi", 
+        "Jangkauan Penglihatan (sel)": "Jarak pandang predator dan mangsa (0 = hanya sel tetangga, 5-20 untuk berburu/menghindar)",
         "Waktu untuk Reproduksi Mangsa": "Interval reproduksi mangsa (langkah)",
         "Waktu untuk Reproduksi Predator": "Interval reproduksi predator (langkah)",
         "Energi Awal Predator": "Energi awal setiap predator",
@@ -207,7 +213,7 @@ def start_gui():
     pop_header.grid(row=current_row, column=0, columnspan=2, pady=(15, 5), sticky="w")
     current_row += 1
     
-    pop_params = ["Banyak Mangsa di Awal", "Banyak Predator di Awal"]
+    pop_params = ["Banyak Mangsa di Awal", "Banyak Predator di Awal", "Jangkauan Penglihatan (sel)"]
     
     for param in pop_params:
         ttk.Label(scrollable_frame, text=param + ":", style='Ocean.TLabel').grid(
@@ -264,6 +270,13 @@ def start_gui():
     # Add navigation mode checkbox with enhanced styling
     nav_var = tk.BooleanVar(value=True)
 
+    # Live mode: render while the simulation runs instead of after it finishes
+    live_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(scrollable_frame, text="Tampilkan simulasi secara langsung",
+                    variable=live_var, style='Ocean.TCheckbutton').grid(
+        row=current_row, column=0, columnspan=2, padx=10, pady=6, sticky="w")
+    current_row += 1
+
     # Add informational text
     info_text = tk.Label(scrollable_frame,
                         text="ℹ️ Sistem Energi Baru:\n" +
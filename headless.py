@@ -0,0 +1,142 @@
+import logging
+import time
+
+import numpy as np
+
+from checkpoint import RATE_PARAMS, save as save_checkpoint
+from convergence import EXTINCTION
+from history import SERIES, StatsSeries
+from trajectory import TrajectoryWriter
+from world import create_world
+
+logger = logging.getLogger(__name__)
+
+# Same values as the Tk form in gui.py, under simulate()'s parameter names
+DEFAULT_PARAMS = {
+    'grid_size': 50,
+    'initial_prey': 250,
+    'initial_predators': 100,
+    'prey_reproduce_interval': 5,
+    'predator_reproduce_interval': 8,
+    'predator_initial_energy': 25,
+    'energy_gain': 20,
+    'energy_loss': 1,
+    'max_steps': 300,
+    'food_density': 0.5,
+    'perception_radius': 0,
+    'engine': 'object',
+}
+
+
+class Result:
+    """Time series of one headless run, one array per statistic
+
+    ``regime`` is how the run ended: 'extinction', or 'equilibrium' /
+    'periodic' when a convergence detector stopped it (None if it simply
+    reached max_steps). ``period`` is the estimated cycle length in steps
+    for periodic runs. Runs resumed from a checkpoint start at its step
+    (``start_step``) rather than at 0.
+    """
+    def __init__(self, params, seed, columns, regime=None, period=None, start_step=0):
+        self.params = params
+        self.seed = seed
+        self.regime = regime
+        self.period = period
+        for name in SERIES:
+            setattr(self, name, np.array(columns[name]))
+        self.steps = np.arange(start_step, start_step + len(self.prey_count))
+
+    def __len__(self):
+        return len(self.steps)
+
+    @property
+    def extinct(self):
+        """Whether the run ended because prey or predators died out"""
+        return bool(self.prey_count[-1] == 0 or self.predator_count[-1] == 0)
+
+    def columns(self):
+        """Columnar table of the run: step index plus every series"""
+        table = {'step': self.steps}
+        table.update((name, getattr(self, name)) for name in SERIES)
+        return table
+
+
+def run_simulation(params=None, seed=None, log_interval=None, convergence=None, trajectory_path=None,
+                   instrumentation=None, checkpoint=None, checkpoint_path=None, checkpoint_interval=None):
+    """Run a simulation without any plotting or per-step printing
+
+    params uses simulate()'s parameter names; anything missing falls back
+    to DEFAULT_PARAMS. When log_interval (seconds) is given, progress is
+    logged through the ``headless`` logger at most once per interval.
+    convergence is an optional ConvergenceDetector that ends the run as
+    soon as it detects a regime. With trajectory_path, every step is also
+    written to a trajectory file. An Instrumentation collects per-phase
+    timings and event counters of every step.
+
+    With a Checkpoint, the run continues from its world and step up to
+    max_steps instead of starting afresh: bit-identically when seed is
+    None, on a new random stream otherwise. Only the rates listed in
+    checkpoint.RATE_PARAMS are taken from params then. With
+    checkpoint_path, the world is saved there at the end of the run, and
+    also every checkpoint_interval steps if that is given.
+    """
+    if checkpoint is not None:
+        rates = {name: value for name, value in (params or {}).items() if name in RATE_PARAMS}
+        params = {**DEFAULT_PARAMS, **(params or {}), **checkpoint.params, **rates, 'engine': checkpoint.engine}
+        world = checkpoint.restore(seed, **rates)
+        start_step = checkpoint.step
+    else:
+        params = {**DEFAULT_PARAMS, **(params or {})}
+        world_params = {name: value for name, value in params.items() if name not in ('max_steps', 'engine')}
+        world = create_world(params['engine'], seed=seed, **world_params)
+        start_step = 0
+
+    # Workers of the partitioned engine are stopped, and the trajectory is flushed, however the run ends
+    trajectory = None
+    try:
+        if trajectory_path:
+            trajectory = TrajectoryWriter(trajectory_path, world.grid_size, world.food.present)
+
+        series = StatsSeries(max(1, params['max_steps'] - start_step + 1))
+        stats = world.stats()
+        series.append(stats)
+        if trajectory is not None:
+            trajectory.append(world.frame(), stats)
+        if convergence is not None:
+            convergence.update(stats)
+        last_log = time.monotonic()
+        step = start_step
+        for step in range(start_step + 1, params['max_steps'] + 1):
+            if instrumentation is None:
+                world.step()
+                stats = world.stats()
+            else:
+                stats = instrumentation.step(world, step)
+            series.append(stats)
+            if trajectory is not None:
+                trajectory.append(world.frame(), stats)
+
+            if log_interval is not None and time.monotonic() - last_log >= log_interval:
+                last_log = time.monotonic()
+                logger.info("step %d/%d: prey=%d predators=%d food=%d", step, params['max_steps'],
+                            stats['prey_count'], stats['predator_count'], stats['available_food'])
+
+            if checkpoint_path and checkpoint_interval and step % checkpoint_interval == 0:
+                save_checkpoint(world, checkpoint_path, step)
+
+            if convergence is not None and convergence.update(stats) is not None:
+                break
+            if not stats['prey_count'] or not stats['predator_count']:
+                break
+
+        if checkpoint_path:
+            save_checkpoint(world, checkpoint_path, step)
+    finally:
+        if trajectory is not None:
+            trajectory.close()
+        world.close()
+
+    if convergence is not None:
+        return Result(params, seed, series, convergence.regime, convergence.period, start_step=start_step)
+    extinct = not stats['prey_count'] or not stats['predator_count']
+    return Result(params, seed, series, EXTINCTION if extinct else None, start_step=start_step)
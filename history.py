@@ -0,0 +1,146 @@
+from collections import namedtuple
+
+import numpy as np
+
+AgentView = namedtuple('AgentView', ['x', 'y', 'energy'])
+FoodView = namedtuple('FoodView', ['x', 'y', 'available'])
+
+# Per-step statistics every run records (step 0 is the initial state)
+SERIES = ('prey_count', 'predator_count', 'avg_prey_energy', 'avg_predator_energy', 'available_food')
+SERIES_DTYPES = {
+    'prey_count': np.int64,
+    'predator_count': np.int64,
+    'avg_prey_energy': np.float64,
+    'avg_predator_energy': np.float64,
+    'available_food': np.int64,
+}
+
+
+class AgentFrame:
+    """Positions and energies of one species at one step, stored as arrays"""
+    def __init__(self, x, y, energy):
+        self.x = x
+        self.y = y
+        self.energy = energy
+
+    def __len__(self):
+        return len(self.x)
+
+    def __iter__(self):
+        # Per-agent records, for code that walks the history like a list of agents
+        for x, y, energy in zip(self.x.tolist(), self.y.tolist(), self.energy.tolist()):
+            yield AgentView(x, y, energy)
+
+
+class FoodFrame:
+    """Food sources at one step: where they are and which are available"""
+    def __init__(self, present, available):
+        self.present = present
+        self.available = available
+
+    def available_count(self):
+        return int(np.count_nonzero(self.available))
+
+    def __len__(self):
+        return int(np.count_nonzero(self.present))
+
+    def __iter__(self):
+        ys, xs = np.nonzero(self.present)
+        for x, y, available in zip(xs.tolist(), ys.tolist(), self.available[ys, xs].tolist()):
+            yield FoodView(x, y, available)
+
+
+class StatsSeries:
+    """Per-step statistics kept as growable arrays, one per field
+
+    ``series[name]`` is an array view over every step recorded so far, so
+    a whole series can be plotted without walking the per-step frames.
+    """
+
+    def __init__(self, capacity=256):
+        self.length = 0
+        self.data = {name: np.zeros(capacity, dtype=SERIES_DTYPES[name]) for name in SERIES}
+
+    def append(self, stats):
+        if self.length == len(self.data['prey_count']):
+            # Double the capacity, so appends stay amortized O(1)
+            for name, values in self.data.items():
+                grown = np.zeros(2 * len(values), dtype=values.dtype)
+                grown[:self.length] = values[:self.length]
+                self.data[name] = grown
+        for name in SERIES:
+            self.data[name][self.length] = stats[name]
+        self.length += 1
+
+    def stats_at(self, step):
+        """Stats dict of one step"""
+        if step < 0:
+            step += self.length
+        return {name: self.data[name][step].item() for name in SERIES}
+
+    def __getitem__(self, name):
+        return self.data[name][:self.length]
+
+    def __len__(self):
+        return self.length
+
+
+class History:
+    """Compact per-step record of a run
+
+    Each step keeps the agents' coordinates and energies as small integer
+    arrays and food availability as a packed bitmap; food positions never
+    change during a run and are stored once. Indexing returns the same
+    (prey, predators, food, stats) tuple SimulationViewer walks through;
+    the statistics are also kept as whole-run arrays in ``series``.
+    """
+
+    def __init__(self, grid_size, food_present):
+        self.grid_size = grid_size
+        self.food_present = food_present.copy()
+        self.coord_dtype = np.uint16 if grid_size <= np.iinfo(np.uint16).max + 1 else np.int32
+        self.steps = []
+        self.series = StatsSeries()
+
+    def append(self, frame, stats):
+        """Record one step from a world's frame() and stats()"""
+        prey_x, prey_y, prey_energy, predator_x, predator_y, predator_energy, food_available = frame
+        self.steps.append((
+            np.stack([prey_x, prey_y]).astype(self.coord_dtype),
+            np.asarray(prey_energy, dtype=np.int32),
+            np.stack([predator_x, predator_y]).astype(self.coord_dtype),
+            np.asarray(predator_energy, dtype=np.int32),
+            np.packbits(food_available, axis=None)
+        ))
+        self.series.append(stats)
+
+    def select(self, steps):
+        """A History of just the given steps (without their statistics), small enough to send to a worker process"""
+        selected = History.__new__(History)
+        selected.grid_size = self.grid_size
+        selected.food_present = self.food_present
+        selected.coord_dtype = self.coord_dtype
+        selected.steps = [self.steps[step] for step in steps]
+        selected.series = StatsSeries(capacity=1)
+        return selected
+
+    def frame_at(self, step):
+        """(prey, predators, food) of one step, without building its stats dict"""
+        prey_xy, prey_energy, predator_xy, predator_energy, food_bits = self.steps[step]
+        n = self.grid_size
+        food_available = np.unpackbits(food_bits, count=n * n).reshape(n, n).astype(bool)
+        return (AgentFrame(prey_xy[0], prey_xy[1], prey_energy),
+                AgentFrame(predator_xy[0], predator_xy[1], predator_energy),
+                FoodFrame(self.food_present, food_available))
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __getitem__(self, step):
+        if isinstance(step, slice):
+            return [self[i] for i in range(*step.indices(len(self)))]
+        return self.frame_at(step) + (self.series.stats_at(step),)
+
+    def __iter__(self):
+        for step in range(len(self)):
+            yield self[step]
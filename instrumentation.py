@@ -0,0 +1,122 @@
+import csv
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Event counters the engines report while instrumented
+COUNTERS = ('prey_births', 'predator_births', 'prey_deaths', 'predator_deaths', 'kills',
+            'food_consumed', 'target_scans', 'targets_found')
+
+
+class Instrumentation:
+    """Phase timers, event counters and per-step observers for one run
+
+    Give it to run_simulation or simulate and every step goes through
+    ``step``. That call times each of ``world.phases`` and ``stats()``,
+    and collects the world's event counters (births, deaths, kills, food
+    consumed, and predator target scans with the number of prey they
+    found). It then calls every observer as
+    ``observer(step, world, stats, record)``. Without an Instrumentation
+    the run loop is untouched and the engines skip all counting, so
+    disabled instrumentation costs nothing.
+
+    ``records`` holds one flat dict per step (``<phase>_seconds`` plus
+    the counters), ready for to_csv/to_json.
+    """
+
+    def __init__(self, observers=()):
+        self.observers = list(observers)
+        self.records = []
+        self.world = None
+
+    def attach(self, world):
+        """Switch on the world's event counters"""
+        if self.world is not world:
+            world.counters = Counter()
+            self.world = world
+
+    def step(self, world, step):
+        """Run one instrumented step of ``world``; returns its stats like world.stats()"""
+        self.attach(world)
+        clock = time.perf_counter
+        record = {'step': step}
+        for name, phase in world.phases:
+            start = clock()
+            phase()
+            record[name + '_seconds'] = clock() - start
+        start = clock()
+        stats = world.stats()
+        record['stats_seconds'] = clock() - start
+
+        counters = world.counters
+        for name in COUNTERS:
+            record[name] = counters[name]
+        counters.clear()
+        self.records.append(record)
+
+        for observer in self.observers:
+            observer(step, world, stats, record)
+        return stats
+
+    @contextmanager
+    def phase(self, name):
+        """Time any other block of the loop (recording, drawing...) into the latest step's record"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.records:
+                record = self.records[-1]
+                key = name + '_seconds'
+                record[key] = record.get(key, 0.0) + time.perf_counter() - start
+
+    def record_at(self, step):
+        """Record of the given step number (as passed to ``step``), or None (the run's first frame, or not run yet)
+
+        Runs resumed from a checkpoint number their steps from the
+        checkpoint's step, so this is not an index into the run's history.
+        """
+        if not self.records:
+            return None
+        index = step - self.records[0]['step']
+        return self.records[index] if 0 <= index < len(self.records) else None
+
+    def _fields(self):
+        fields = {}
+        for record in self.records:
+            fields.update(dict.fromkeys(record))
+        return list(fields)
+
+    def summary(self):
+        """Mean seconds per step for each timed phase and totals of every counter"""
+        steps = len(self.records)
+        timed = [name for name in self._fields() if name.endswith('_seconds')]
+        return {
+            'steps': steps,
+            'seconds_per_step': {name[:-len('_seconds')]: sum(record.get(name, 0.0) for record in self.records) / steps
+                                 for name in timed} if steps else {},
+            'counters': {name: sum(record[name] for record in self.records) for name in COUNTERS},
+        }
+
+    def to_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=self._fields())
+            writer.writeheader()
+            writer.writerows(self.records)
+
+    def to_json(self, path):
+        with open(path, 'w') as f:
+            json.dump({'summary': self.summary(), 'records': self.records}, f, indent=2)
+
+    def overlay_text(self, step):
+        """Short per-step profile for the viewer overlay, by step number like record_at"""
+        record = self.record_at(step)
+        if record is None:
+            return ''
+        lines = [f"{name[:-len('_seconds')]}: {value * 1000:.2f} ms"
+                 for name, value in record.items() if name.endswith('_seconds')]
+        lines.append(f"lahir: {record['prey_births']} mangsa, {record['predator_births']} predator")
+        lines.append(f"mati: {record['prey_deaths']} mangsa, {record['predator_deaths']} predator")
+        lines.append(f"dimangsa: {record['kills']} | makanan: {record['food_consumed']}")
+        return '\n'.join(lines)
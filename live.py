@@ -0,0 +1,136 @@
+import queue
+import threading
+
+from convergence import EQUILIBRIUM, PERIODIC
+from history import AgentFrame, FoodFrame, StatsSeries
+
+
+class LiveRun:
+    """Runs a simulation in a background thread and hands its frames to a viewer
+
+    Frames go through a small bounded queue. When the viewer falls behind,
+    the oldest queued frame is dropped instead of blocking, so rendering
+    never throttles the simulation. Statistics of every step are kept in
+    ``series`` regardless of dropped frames. ``len()`` is the planned number
+    of frames, so a viewer can lay out its time axis up front.
+
+    A world restored from a checkpoint continues from ``start_step``. With
+    a ConvergenceDetector the run also ends once the populations have
+    settled, like simulate() does.
+    """
+
+    def __init__(self, world, max_steps, queue_size=2, recorders=(), instrumentation=None, convergence=None,
+                 start_step=0):
+        self.world = world
+        self.max_steps = max_steps
+        self.start_step = start_step
+        self.grid_size = world.grid_size
+        self.food_present = world.food.present.copy()
+        self.recorders = list(recorders)
+        self.instrumentation = instrumentation
+        self.convergence = convergence
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.series = StatsSeries(max(1, max_steps - start_step + 1))
+        self.dropped_frames = 0
+        self.steps_done = start_step
+
+        self.resumed = threading.Event()  # cleared while paused
+        self.resumed.set()
+        self.stopped = threading.Event()
+        self.finished = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+        # The initial state is available before the worker starts
+        stats = self.world.stats()
+        self._publish(start_step, stats)
+        if convergence is not None:
+            convergence.update(stats)
+
+    def __len__(self):
+        return max(1, self.max_steps - self.start_step + 1)
+
+    def start(self):
+        self.thread.start()
+
+    def pause(self):
+        self.resumed.clear()
+
+    def resume(self):
+        self.resumed.set()
+
+    @property
+    def paused(self):
+        return not self.resumed.is_set()
+
+    def stop(self):
+        self.stopped.set()
+        self.resumed.set()  # Wake the worker up if it is paused
+
+    def _run(self):
+        try:
+            for step in range(self.start_step + 1, self.max_steps + 1):
+                self.resumed.wait()
+                if self.stopped.is_set():
+                    break
+                if self.instrumentation is None:
+                    self.world.step()
+                    stats = self.world.stats()
+                else:
+                    stats = self.instrumentation.step(self.world, step)
+                self._publish(step, stats)
+                if self.convergence is not None and self.convergence.update(stats) in (EQUILIBRIUM, PERIODIC):
+                    break
+                if not stats['prey_count'] or not stats['predator_count']:
+                    break
+        finally:
+            self.finished.set()
+
+    def _publish(self, step, stats):
+        frame = self.world.frame()
+        for recorder in self.recorders:
+            recorder.append(frame, stats)
+        # Series first: a frame in the queue always has its stats recorded
+        self.series.append(stats)
+        self.steps_done = step
+
+        item = (step - self.start_step, frame, stats)
+        try:
+            self.frames.put_nowait(item)
+        except queue.Full:
+            # Backpressure: drop the oldest frame, the viewer only needs the newest
+            try:
+                self.frames.get_nowait()
+                self.dropped_frames += 1
+            except queue.Empty:
+                pass
+            self.frames.put_nowait(item)
+
+    def latest(self):
+        """Newest published (index, prey, predators, food, stats), or None if nothing new arrived
+
+        index counts frames from the run's first one, like a History
+        index: the frame shows step start_step + index.
+        """
+        item = None
+        while True:
+            try:
+                newer = self.frames.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                self.dropped_frames += 1  # Skipped over, never shown
+            item = newer
+        if item is None:
+            return None
+        index, frame, stats = item
+        prey_x, prey_y, prey_energy, predator_x, predator_y, predator_energy, food_available = frame
+        return (index,
+                AgentFrame(prey_x, prey_y, prey_energy),
+                AgentFrame(predator_x, predator_y, predator_energy),
+                FoodFrame(self.food_present, food_available),
+                stats)
+
+    @property
+    def done(self):
+        """Whether the worker has finished and every frame has been taken"""
+        return self.finished.is_set() and self.frames.empty()
@@ -1,4 +1,10 @@
-from gui import start_gui
+import sys
 
 if __name__ == "__main__":
-    start_gui()
+    if len(sys.argv) > 1:
+        # Replay a saved trajectory file instead of starting a new simulation
+        from simulation import replay
+        replay(sys.argv[1])
+    else:
+        from gui import start_gui
+        start_gui()
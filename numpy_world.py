@@ -0,0 +1,381 @@
+import numpy as np
+
+from agents import FoodField, Prey
+from perception import agent_counts, climb, sense
+from rng import numpy_generator
+from spatial import EMPTY, OccupancyGrid, check_capacity
+from world import World
+
+# Direction table shared by every move, same order as Agent.move
+MOVES = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)])
+
+
+def _at(r, y, x):
+    """Grid index of cells, with the replicate in front when the grids have a replicate axis (r not None)"""
+    return (y, x) if r is None else (r, y, x)
+
+
+def _pick(r, index):
+    return None if r is None else r[index]
+
+
+def _join(r, new_r):
+    return None if r is None else np.concatenate([r, new_r])
+
+
+# Step rules shared by every vectorized engine (NumpyWorld, EnsembleWorld and the partitioned tiles)
+
+def neighbours(x, y, grid_size):
+    """(count, 4) x and y arrays of the cells next to each position, in MOVES order"""
+    return (x[:, None] + MOVES[:, 0]) % grid_size, (y[:, None] + MOVES[:, 1]) % grid_size
+
+
+def pick_neighbour(candidates, rng):
+    """Random one of each row's candidate neighbours (a (count, 4) mask), and whether there was any"""
+    keys = rng.random(candidates.shape)
+    keys[~candidates] = -1.0
+    return keys.argmax(axis=1), candidates.any(axis=1)
+
+
+def free_neighbour(ids, x, y, rng, r=None):
+    """Random empty cell next to each position, and whether there was one"""
+    neighbour_x, neighbour_y = neighbours(x, y, ids.shape[-1])
+    free = ids[_at(None if r is None else r[:, None], neighbour_y, neighbour_x)] == EMPTY
+    direction, has_room = pick_neighbour(free, rng)
+    rows = np.arange(len(x))
+    return neighbour_x[rows, direction], neighbour_y[rows, direction], has_room
+
+
+def wander(count, rng, preferred=None):
+    """Random direction for each agent, or its ``preferred`` one where that is >= 0 (see perception.climb)"""
+    direction = rng.integers(4, size=count)
+    return direction if preferred is None else np.where(preferred >= 0, preferred, direction)
+
+
+def hunt(has_prey, rng, chase=None):
+    """Predator directions: a random prey neighbour where there is one, otherwise wander(); and who hunts"""
+    prey_direction, hunting = pick_neighbour(has_prey, rng)
+    return np.where(hunting, prey_direction, wander(len(has_prey), rng, chase)), hunting
+
+
+def forage(energy, on_food, rng):
+    """Prey energy after one step: the step's loss, then food (if on it) or a chance of natural food"""
+    energy = energy - Prey.energy_loss_per_step
+    natural_food = ~on_food & (rng.random(len(energy)) < Prey.natural_food_chance)
+    gain = np.where(on_food, Prey.energy_gain_from_food, np.where(natural_food, Prey.natural_food_energy, 0))
+    return np.where(gain > 0, np.minimum(Prey.max_energy, energy + gain), energy)
+
+
+def prey_ready(energy, ssr, interval):
+    """Prey that may reproduce"""
+    return (ssr >= interval) & (energy >= Prey.min_reproduce_energy) & (energy >= Prey.reproduction_cost * 2)
+
+
+def predator_ready(energy, ssr, interval, energy_loss):
+    """Predators that may reproduce"""
+    return (ssr >= interval) & (energy > energy_loss * 10)
+
+
+# Initial populations, shared by every vectorized engine
+
+def random_cells(rng, grid_size, count):
+    """``count`` distinct random cell indices (y * grid_size + x), for one agent per cell"""
+    check_capacity(grid_size, count)
+    return rng.choice(grid_size * grid_size, size=count, replace=False)
+
+
+def initial_prey_energy(rng, count):
+    """Random starting energies of a new world's prey, in Prey.initial_energy's range"""
+    low, high = Prey.initial_energy
+    return rng.integers(low, high + 1, size=count)
+
+
+class BatchedWorld(World):
+    """Vectorized step rules over an optional leading replicate axis
+
+    Agents are struct-of-arrays. ``prey_r``/``predator_r`` hold each
+    agent's replicate and the ``ids`` and ``_claims`` grids start with a
+    replicate axis, or they are None and the grids are plain 2-D for a
+    single world: NumpyWorld is the batch of one, EnsembleWorld the batch
+    of many. Subclasses set up the state and provide the food phases.
+    """
+
+    prey_r = predator_r = None
+    replicates = 1
+
+    def _cells(self, r, x, y):
+        """Boolean grid(s) marking the cells that hold at least one of the given agents"""
+        cells = np.zeros(self.ids.shape, dtype=bool)
+        cells[_at(r, y, x)] = True
+        return cells
+
+    def _new_ids(self, count):
+        ids = np.arange(self.next_id, self.next_id + count)
+        self.next_id += count
+        return ids
+
+    def _claim(self, target_r, target_x, target_y, allowed):
+        """Indices of the claimants that win their target cell, one per cell in random priority
+
+        Every allowed claim writes its index into a scratch grid in random
+        order, so each cell ends up with exactly one of them: constant time
+        per claim, no sorting.
+        """
+        claimants = self.rng.permutation(np.flatnonzero(allowed))
+        cell = _at(_pick(target_r, claimants), target_y[claimants], target_x[claimants])
+        self._claims[cell] = claimants
+        return claimants[self._claims[cell] == claimants]
+
+    def step(self):
+        for _, phase in self.phases:
+            phase()
+
+    def _prey_pass(self):
+        n = self.grid_size
+        rng = self.rng
+        ids = self.ids
+
+        # Prey actions: move onto a cell that is empty, lose energy, forage, reproduce
+        r, x, y = self.prey_r, self.prey_x, self.prey_y
+        energy, ssr, pid = self.prey_energy, self.prey_ssr, self.prey_id
+        flee = None
+        if self.perception_radius:
+            # Flee down the sensed predator density wherever it is not flat
+            counts = agent_counts(n, self.predator_x, self.predator_y, self.predator_r, self.replicates)
+            flee = climb(-sense(counts, self.perception_radius), x, y, r)
+        direction = wander(len(x), rng, flee)
+        target_x = (x + MOVES[direction, 0]) % n
+        target_y = (y + MOVES[direction, 1]) % n
+        movers = self._claim(r, target_x, target_y, ids[_at(r, target_y, target_x)] == EMPTY)
+        mover_r = _pick(r, movers)
+        ids[_at(mover_r, y[movers], x[movers])] = EMPTY
+        ids[_at(mover_r, target_y[movers], target_x[movers])] = pid[movers]
+        x, y = x.copy(), y.copy()
+        x[movers], y[movers] = target_x[movers], target_y[movers]
+
+        energy = forage(energy, self._food_available[_at(r, y, x)], rng)
+        ssr = ssr + 1
+
+        # Remove dead prey, freeing their cells
+        alive = energy > 0
+        ids[_at(_pick(r, ~alive), y[~alive], x[~alive])] = EMPTY
+        r, x, y, energy, ssr, pid = _pick(r, alive), x[alive], y[alive], energy[alive], ssr[alive], pid[alive]
+
+        # Newborns claim a free cell next to their parent
+        parents = np.flatnonzero(prey_ready(energy, ssr, self.prey_reproduce_interval))
+        parent_r = _pick(r, parents)
+        child_x, child_y, has_room = free_neighbour(ids, x[parents], y[parents], rng, parent_r)
+        born = self._claim(parent_r, child_x, child_y, has_room)
+        child_x, child_y, breed = child_x[born], child_y[born], parents[born]
+        child_r = _pick(r, breed)
+        energy[breed] -= Prey.reproduction_cost
+        ssr[breed] = 0
+        child_id = self._new_ids(len(breed))
+        ids[_at(child_r, child_y, child_x)] = child_id
+
+        self.prey_r = _join(r, child_r)
+        self.prey_x = np.concatenate([x, child_x])
+        self.prey_y = np.concatenate([y, child_y])
+        self.prey_energy = np.concatenate([energy, np.full(len(breed), Prey.reproduction_cost)])
+        self.prey_ssr = np.concatenate([ssr, np.zeros(len(breed), dtype=np.int64)])
+        self.prey_id = np.concatenate([pid, child_id])
+
+        if self.counters is not None:
+            self.counters['prey_births'] += len(breed)
+            self.counters['prey_deaths'] += len(alive) - len(x)
+
+    def _predator_pass(self):
+        n = self.grid_size
+        rng = self.rng
+        ids = self.ids
+        r, x, y = self.prey_r, self.prey_x, self.prey_y
+        prey_cells = self._cells(r, x, y)
+
+        # Predator actions: hunt an adjacent prey cell (random pick) or wander onto an empty one
+        pr, px, py, pid = self.predator_r, self.predator_x, self.predator_y, self.predator_id
+        count = len(px)
+        neighbour_x, neighbour_y = neighbours(px, py, n)
+        has_prey = prey_cells[_at(None if pr is None else pr[:, None], neighbour_y, neighbour_x)]
+        chase = None
+        if self.perception_radius:
+            # Without a prey neighbour, chase up the sensed prey density
+            chase = climb(sense(prey_cells.astype(np.int64), self.perception_radius), px, py, pr)
+        direction, hunting = hunt(has_prey, rng, chase)
+        rows = np.arange(count)
+        target_x = neighbour_x[rows, direction]
+        target_y = neighbour_y[rows, direction]
+
+        # Settle conflicts: a random one of the predators claiming each cell gets it
+        movers = self._claim(pr, target_x, target_y, hunting | (ids[_at(pr, target_y, target_x)] == EMPTY))
+        mover_r = _pick(pr, movers)
+        ids[_at(mover_r, py[movers], px[movers])] = EMPTY
+        ids[_at(mover_r, target_y[movers], target_x[movers])] = pid[movers]
+        px, py = px.copy(), py.copy()
+        px[movers], py[movers] = target_x[movers], target_y[movers]
+
+        penergy = self.predator_energy - self.energy_loss
+        pssr = self.predator_ssr + 1
+        winners = movers[hunting[movers]]
+        penergy[winners] += self.energy_gain
+
+        # Eaten prey leave the lists; their cells already hold the predators
+        eaten = self._cells(_pick(pr, winners), px[winners], py[winners])
+        survivors = ~eaten[_at(r, y, x)]
+        self.prey_r, self.prey_x, self.prey_y = _pick(r, survivors), x[survivors], y[survivors]
+        self.prey_energy, self.prey_ssr = self.prey_energy[survivors], self.prey_ssr[survivors]
+        self.prey_id = self.prey_id[survivors]
+
+        # Remove dead predators, freeing their cells
+        alive = penergy > 0
+        ids[_at(_pick(pr, ~alive), py[~alive], px[~alive])] = EMPTY
+        pr, px, py, penergy, pssr, pid = _pick(pr, alive), px[alive], py[alive], penergy[alive], pssr[alive], pid[alive]
+
+        # Predator reproduction splits energy between parent and child, who takes a free neighbour cell
+        parents = np.flatnonzero(predator_ready(penergy, pssr, self.predator_reproduce_interval, self.energy_loss))
+        parent_r = _pick(pr, parents)
+        child_x, child_y, has_room = free_neighbour(ids, px[parents], py[parents], rng, parent_r)
+        born = self._claim(parent_r, child_x, child_y, has_room)
+        child_x, child_y, breed = child_x[born], child_y[born], parents[born]
+        child_r = _pick(pr, breed)
+        child_energy = penergy[breed] // 2
+        penergy[breed] //= 2
+        pssr[breed] = 0
+        child_id = self._new_ids(len(breed))
+        ids[_at(child_r, child_y, child_x)] = child_id
+
+        self.predator_r = _join(pr, child_r)
+        self.predator_x = np.concatenate([px, child_x])
+        self.predator_y = np.concatenate([py, child_y])
+        self.predator_energy = np.concatenate([penergy, child_energy])
+        self.predator_ssr = np.concatenate([pssr, np.zeros(len(breed), dtype=np.int64)])
+        self.predator_id = np.concatenate([pid, child_id])
+
+        if self.counters is not None:
+            self.counters['kills'] += len(winners)
+            self.counters['predator_births'] += len(breed)
+            self.counters['predator_deaths'] += len(alive) - len(px)
+            self.counters['target_scans'] += count
+            self.counters['targets_found'] += int(np.count_nonzero(has_prey))
+
+
+class NumpyWorld(BatchedWorld):
+    """Vectorized engine: struct-of-arrays agent state stepped with batched NumPy operations
+
+    Follows the same Prey/Predator/Food rules as ObjectWorld, including one
+    agent per cell. The only difference is how simultaneous moves are
+    settled: all agents of a species move at once, a move or birth may only
+    claim a cell that was empty before the move (or a prey cell, for a
+    hunting predator), and a random one of the claimants wins each cell.
+    Agents that lose a claim stay where they are.
+
+    With a perception_radius, prey flee down and predators without a prey
+    neighbour chase up the other species' sensed density (see perception).
+    """
+
+    engine = "numpy"
+
+    def __init__(self, grid_size, initial_prey, initial_predators, prey_reproduce_interval,
+                 predator_reproduce_interval, predator_initial_energy, energy_gain,
+                 energy_loss, food_density=0.1, seed=None, perception_radius=0):
+        self.grid_size = grid_size
+        self.perception_radius = perception_radius  # Sensing range in cells; 0 = neighbours only
+        self.prey_reproduce_interval = prey_reproduce_interval
+        self.predator_reproduce_interval = predator_reproduce_interval
+        self.energy_gain = energy_gain
+        self.energy_loss = energy_loss
+        self.rng = numpy_generator(seed)
+        rng = self.rng
+
+        # Create initial populations, one agent per cell
+        cells = random_cells(rng, grid_size, initial_prey + initial_predators)
+        self.prey_x, self.prey_y = cells[:initial_prey] % grid_size, cells[:initial_prey] // grid_size
+        self.prey_energy = initial_prey_energy(rng, initial_prey)
+        self.prey_ssr = np.zeros(initial_prey, dtype=np.int64)
+
+        self.predator_x, self.predator_y = cells[initial_prey:] % grid_size, cells[initial_prey:] // grid_size
+        self.predator_energy = np.full(initial_predators, predator_initial_energy, dtype=np.int64)
+        self.predator_ssr = np.zeros(initial_predators, dtype=np.int64)
+
+        # Occupancy grid of agent ids; each agent keeps its id for life
+        self.occupancy = OccupancyGrid(grid_size)
+        self.next_id = 0
+        self.prey_id = self._new_ids(initial_prey)
+        self.predator_id = self._new_ids(initial_predators)
+        self.occupancy.ids[self.prey_y, self.prey_x] = self.prey_id
+        self.occupancy.ids[self.predator_y, self.predator_x] = self.predator_id
+        self._claims = np.empty((grid_size, grid_size), dtype=np.int64)  # Scratch grid for _claim
+
+        # Event counters, switched on by instrumentation.Instrumentation (None = no counting)
+        self.counters = None
+
+        # Create food sources, indexed by cell
+        num_food = int(grid_size * grid_size * food_density)
+        self.food = FoodField(grid_size, rng.integers(grid_size, size=num_food), rng.integers(grid_size, size=num_food))
+
+        # The step is split into named phases so tools can time them individually
+        self.phases = [
+            ('food_regen', self._regenerate_food),
+            ('prey_pass', self._prey_pass),
+            ('food_consumption', self._consume_food),
+            ('predator_pass', self._predator_pass),
+        ]
+
+    @property
+    def ids(self):
+        """Occupancy grid of agent ids, EMPTY where no agent stands"""
+        return self.occupancy.ids
+
+    def _regenerate_food(self):
+        # Update food regeneration
+        self.food.step()
+        self._food_available = self.food.available()
+
+    def _consume_food(self):
+        # Consume food where prey are located
+        eaten = self.food.consume_many(self.prey_x, self.prey_y)
+        if self.counters is not None:
+            self.counters['food_consumed'] += int(np.count_nonzero(eaten))
+
+    def stats(self):
+        return {
+            'prey_count': len(self.prey_x),
+            'predator_count': len(self.predator_x),
+            'avg_prey_energy': float(self.prey_energy.mean()) if len(self.prey_energy) else 0,
+            'avg_predator_energy': float(self.predator_energy.mean()) if len(self.predator_energy) else 0,
+            'available_food': self.food.available_count()
+        }
+
+    def snapshot(self):
+        """Everything that changes while stepping, for checkpoint.save (arrays plus JSON-able values)"""
+        return {
+            'prey_x': self.prey_x, 'prey_y': self.prey_y, 'prey_energy': self.prey_energy,
+            'prey_ssr': self.prey_ssr, 'prey_id': self.prey_id,
+            'predator_x': self.predator_x, 'predator_y': self.predator_y, 'predator_energy': self.predator_energy,
+            'predator_ssr': self.predator_ssr, 'predator_id': self.predator_id,
+            'ids': self.occupancy.ids,
+            'next_id': self.next_id,
+            'food_present': self.food.present,
+            'food_timer': self.food.time_until_regen,
+            'rng_state': self.rng.bit_generator.state,
+        }
+
+    def restore(self, state):
+        """Replace the dynamic state with a snapshot()'s"""
+        for name in ('prey_x', 'prey_y', 'prey_energy', 'prey_ssr', 'prey_id',
+                     'predator_x', 'predator_y', 'predator_energy', 'predator_ssr', 'predator_id'):
+            setattr(self, name, state[name].copy())
+        self.occupancy.ids = state['ids'].copy()
+        self.next_id = state['next_id']
+        self.food.present = state['food_present'].copy()
+        self.food.time_until_regen = state['food_timer'].copy()
+        self.rng.bit_generator.state = state['rng_state']
+
+    def reseed(self, seed):
+        """Continue with a fresh random stream, e.g. to fork several runs from one checkpoint"""
+        self.rng = numpy_generator(seed)
+
+    def frame(self):
+        """Agent coordinate/energy arrays and the food availability grid, for History.append"""
+        return (self.prey_x, self.prey_y, self.prey_energy,
+                self.predator_x, self.predator_y, self.predator_energy,
+                self.food.available())
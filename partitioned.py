@@ -0,0 +1,544 @@
+import multiprocessing
+import os
+import weakref
+from collections import Counter
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from agents import FoodField, Prey
+from numpy_world import (MOVES, forage, free_neighbour, hunt, initial_prey_energy, neighbours,
+                         predator_ready, prey_ready, random_cells, wander)
+from rng import numpy_generator, spawn
+from spatial import EMPTY
+from world import World
+
+# Species grid codes
+NO_AGENT, PREY, PREDATOR = 0, 1, 2
+
+# Struct-of-arrays columns of one group of agents
+COLUMNS = ('x', 'y', 'energy', 'ssr', 'id')
+
+
+def _agents(x=(), y=(), energy=(), ssr=None, ids=()):
+    x = np.asarray(x, dtype=np.int64)
+    return {'x': x, 'y': np.asarray(y, dtype=np.int64), 'energy': np.asarray(energy, dtype=np.int64),
+            'ssr': np.zeros(len(x), dtype=np.int64) if ssr is None else np.asarray(ssr, dtype=np.int64),
+            'id': np.asarray(ids, dtype=np.int64)}
+
+
+def _take(agents, index):
+    return {name: column[index] for name, column in agents.items()}
+
+
+def _concat(*groups):
+    return {name: np.concatenate([group[name] for group in groups]) for name in groups[0]}
+
+
+def _shared_array(shape, dtype, name=None):
+    """(SharedMemory, ndarray view): a new block, or the existing block ``name``"""
+    dtype = np.dtype(dtype)
+    if name is None:
+        shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+    else:
+        shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+class _Tile:
+    """One horizontal strip of the world, stepped by its own worker process
+
+    The strip owns rows y0..y1-1 of the shared grids and every agent on
+    them. Each method is one sub-phase of the step and follows one rule so
+    results never depend on worker timing: propose_* methods may read the
+    neighbouring strips' boundary rows (the halo) but write nothing
+    shared, resolve_*/settle_* methods write only their own rows.
+
+    Moves and births that leave the strip become claims sent to the strip
+    that owns the target cell. The owner settles all claims on its cells,
+    local and incoming, in one random order and adopts the winners; the
+    losers stay where they were.
+    """
+
+    def __init__(self, index, bounds, grid_size, grids, params, prey, predators, seed, first_id):
+        self.index = index
+        self.bounds = np.asarray(bounds)
+        self.grid_size = grid_size
+        self.y0, self.y1 = int(bounds[index]), int(bounds[index + 1])
+        self.params = params
+        self.rng = numpy_generator(seed)
+
+        self.grids = grids
+        self.blocks = []
+        for attribute, (name, shape, dtype) in grids.items():
+            shm, array = _shared_array(shape, dtype, name)
+            self.blocks.append(shm)
+            setattr(self, attribute, array)
+
+        self.prey = prey
+        self.predators = predators
+        self.next_id = first_id + index  # New ids step by the tile count, so they never collide across tiles
+        height = self.y1 - self.y0
+        self._scratch = np.empty((height, grid_size), dtype=np.int64)
+        self._prey_index = np.full((height, grid_size), -1, dtype=np.int64)
+        self._claims = None
+        self.counters = Counter()  # Events since the last finish()
+
+    def close(self):
+        for attribute in self.grids:
+            delattr(self, attribute)  # Views must go before their blocks can be closed
+        for shm in self.blocks:
+            shm.close()
+
+    def _new_ids(self, count):
+        ids = self.next_id + len(self.bounds[:-1]) * np.arange(count)
+        self.next_id += len(self.bounds[:-1]) * count
+        return ids
+
+    def _owner(self, y):
+        return np.searchsorted(self.bounds, y, side='right') - 1
+
+    def _propose(self, agents, claimants, target_x, target_y):
+        """Keep the claims on own cells, return the others grouped by the tile that owns the target"""
+        owner = self._owner(target_y)
+        local = owner == self.index
+        self._claims = (claimants[local], target_x[local], target_y[local])
+        outgoing = {}
+        for tile in np.unique(owner[~local]):
+            chosen = owner == tile
+            claim = _take(agents, claimants[chosen])
+            claim.update(source=claimants[chosen], tx=target_x[chosen], ty=target_y[chosen])
+            outgoing[int(tile)] = claim
+        return outgoing
+
+    def _settle_claims(self, incoming):
+        """Winners among local and incoming claims
+
+        Returns (won mask over the local claims, {source tile: indices of its
+        claims that won}, winning incoming agents placed on their targets).
+
+        Claims are scattered into a scratch grid in random order, so each
+        cell keeps exactly one of them: constant time per claim.
+        """
+        local, local_x, local_y = self._claims
+        sources = [source for source, _ in incoming]
+        claims = [claim for _, claim in incoming]
+        tx = np.concatenate([local_x] + [claim['tx'] for claim in claims])
+        ty = np.concatenate([local_y] + [claim['ty'] for claim in claims])
+        order = self.rng.permutation(len(tx))
+        self._scratch[ty[order] - self.y0, tx[order]] = order
+        won = self._scratch[ty - self.y0, tx] == np.arange(len(tx))
+
+        won_sources = {}
+        arrived = []
+        start = len(local)
+        for source, claim in zip(sources, claims):
+            won_claim = won[start:start + len(claim['tx'])]
+            start += len(claim['tx'])
+            won_sources[source] = claim['source'][won_claim]
+            agents = {name: claim[name][won_claim] for name in COLUMNS}
+            agents['x'], agents['y'] = claim['tx'][won_claim], claim['ty'][won_claim]
+            arrived.append(agents)
+        return won[:len(local)], won_sources, arrived
+
+    def _occupy(self, agents, species):
+        self.ids[agents['y'], agents['x']] = agents['id']
+        self.species[agents['y'], agents['x']] = species
+
+    def _vacate(self, x, y):
+        self.ids[y, x] = EMPTY
+        self.species[y, x] = NO_AGENT
+
+    def _leave(self, agents, gone):
+        """Agents minus the indices in ``gone`` (whose cells were already handed over or vacated)"""
+        keep = np.ones(len(agents['x']), dtype=bool)
+        keep[gone] = False
+        return _take(agents, keep)
+
+    # Prey pass
+
+    def propose_prey_moves(self):
+        # Food regeneration on own rows
+        timer = self.timer[self.y0:self.y1]
+        np.subtract(timer, 1, out=timer, where=timer > 0)
+
+        n = self.grid_size
+        prey = self.prey
+        direction = wander(len(prey['x']), self.rng)
+        target_x = (prey['x'] + MOVES[direction, 0]) % n
+        target_y = (prey['y'] + MOVES[direction, 1]) % n
+        claimants = np.flatnonzero(self.ids[target_y, target_x] == EMPTY)
+        return self._propose(prey, claimants, target_x[claimants], target_y[claimants])
+
+    def resolve_prey_moves(self, incoming):
+        won, won_sources, arrived = self._settle_claims(incoming)
+        prey = self.prey
+        claimants, target_x, target_y = self._claims
+        movers = claimants[won]
+        self._vacate(prey['x'][movers], prey['y'][movers])
+        prey['x'][movers], prey['y'][movers] = target_x[won], target_y[won]
+        self._occupy(_take(prey, movers), PREY)
+        for agents in arrived:
+            self._occupy(agents, PREY)
+        self.prey = _concat(prey, *arrived)
+        return won_sources
+
+    def settle_prey(self, emigrated):
+        self._vacate(self.prey['x'][emigrated], self.prey['y'][emigrated])
+        prey = self._leave(self.prey, emigrated)
+
+        x, y = prey['x'], prey['y']
+        prey['energy'] = forage(prey['energy'], self.present[y, x] & (self.timer[y, x] == 0), self.rng)
+        prey['ssr'] = prey['ssr'] + 1
+
+        # Remove dead prey, freeing their cells
+        dead = prey['energy'] <= 0
+        self._vacate(x[dead], y[dead])
+        self.prey = _take(prey, ~dead)
+        self.counters['prey_deaths'] += int(np.count_nonzero(dead))
+
+    def propose_prey_births(self):
+        prey = self.prey
+        parents = np.flatnonzero(prey_ready(prey['energy'], prey['ssr'], self.params['prey_reproduce_interval']))
+        child_x, child_y, has_room = free_neighbour(self.ids, prey['x'][parents], prey['y'][parents], self.rng)
+        return self._propose(prey, parents[has_room], child_x[has_room], child_y[has_room])
+
+    def resolve_prey_births(self, incoming):
+        won, won_sources, arrived = self._settle_claims(incoming)
+        claimants, child_x, child_y = self._claims
+        parents = claimants[won]
+        children = [_agents(child_x[won], child_y[won], np.full(len(parents), Prey.reproduction_cost))]
+        self._breed_prey(parents)
+        children += [_agents(agents['x'], agents['y'], np.full(len(agents['x']), Prey.reproduction_cost))
+                     for agents in arrived]
+        for child in children:
+            child['id'] = self._new_ids(len(child['x']))
+            self._occupy(child, PREY)
+            self.counters['prey_births'] += len(child['x'])
+        self.prey = _concat(self.prey, *children)
+        return won_sources
+
+    def _breed_prey(self, parents):
+        self.prey['energy'][parents] -= Prey.reproduction_cost
+        self.prey['ssr'][parents] = 0
+
+    # Predator pass
+
+    def propose_predator_moves(self, prey_parents):
+        self._breed_prey(prey_parents)
+
+        # Consume food where prey are located
+        x, y = self.prey['x'], self.prey['y']
+        eaten = self.present[y, x] & (self.timer[y, x] == 0)
+        self.timer[y[eaten], x[eaten]] = self.params['regeneration_time']
+        self.counters['food_consumed'] += int(np.count_nonzero(eaten))
+
+        predators = self.predators
+        predators['energy'] = predators['energy'] - self.params['energy_loss']
+        predators['ssr'] = predators['ssr'] + 1
+
+        # Hunt an adjacent prey cell (random pick, halo included) or wander onto an empty one
+        count = len(predators['x'])
+        neighbour_x, neighbour_y = neighbours(predators['x'], predators['y'], self.grid_size)
+        has_prey = self.species[neighbour_y, neighbour_x] == PREY
+        direction, hunting = hunt(has_prey, self.rng)
+        self.counters['target_scans'] += count
+        self.counters['targets_found'] += int(np.count_nonzero(has_prey))
+        rows = np.arange(count)
+        target_x = neighbour_x[rows, direction]
+        target_y = neighbour_y[rows, direction]
+        claimants = np.flatnonzero(hunting | (self.ids[target_y, target_x] == EMPTY))
+        return self._propose(predators, claimants, target_x[claimants], target_y[claimants])
+
+    def _eat(self, agents):
+        """Remove the prey (if any) on the cells the given predators won; returns which of them ate"""
+        index = self._prey_index
+        prey = self.prey
+        index[prey['y'] - self.y0, prey['x']] = np.arange(len(prey['x']))
+        victims = index[agents['y'] - self.y0, agents['x']]
+        index[prey['y'] - self.y0, prey['x']] = -1
+        ate = victims >= 0
+        self.prey = self._leave(prey, victims[ate])
+        return ate
+
+    def resolve_predator_moves(self, incoming):
+        won, won_sources, arrived = self._settle_claims(incoming)
+        predators = self.predators
+        claimants, target_x, target_y = self._claims
+        movers = claimants[won]
+        self._vacate(predators['x'][movers], predators['y'][movers])
+        predators['x'][movers], predators['y'][movers] = target_x[won], target_y[won]
+
+        moved = _take(predators, movers)
+        arrived = _concat(moved, *arrived) if arrived else moved
+        ate = self._eat(arrived)
+        self.counters['kills'] += int(np.count_nonzero(ate))
+        gain = np.where(ate, self.params['energy_gain'], 0)
+        predators['energy'][movers] += gain[:len(movers)]
+        arrived['energy'][len(movers):] += gain[len(movers):]
+        self._occupy(arrived, PREDATOR)
+        self.predators = _concat(predators, _take(arrived, slice(len(movers), None)))
+        return won_sources
+
+    def settle_predators(self, emigrated):
+        self._vacate(self.predators['x'][emigrated], self.predators['y'][emigrated])
+        predators = self._leave(self.predators, emigrated)
+
+        # Remove dead predators, freeing their cells
+        dead = predators['energy'] <= 0
+        self._vacate(predators['x'][dead], predators['y'][dead])
+        self.predators = _take(predators, ~dead)
+        self.counters['predator_deaths'] += int(np.count_nonzero(dead))
+
+    def propose_predator_births(self):
+        predators = self.predators
+        parents = np.flatnonzero(predator_ready(predators['energy'], predators['ssr'],
+                                                self.params['predator_reproduce_interval'], self.params['energy_loss']))
+        child_x, child_y, has_room = free_neighbour(self.ids, predators['x'][parents], predators['y'][parents],
+                                                    self.rng)
+        return self._propose(predators, parents[has_room], child_x[has_room], child_y[has_room])
+
+    def resolve_predator_births(self, incoming):
+        won, won_sources, arrived = self._settle_claims(incoming)
+        claimants, child_x, child_y = self._claims
+        parents = claimants[won]
+        children = [_agents(child_x[won], child_y[won], self.predators['energy'][parents] // 2)]
+        self._breed_predators(parents)
+        children += [_agents(agents['x'], agents['y'], agents['energy'] // 2) for agents in arrived]
+        for child in children:
+            child['id'] = self._new_ids(len(child['x']))
+            self._occupy(child, PREDATOR)
+            self.counters['predator_births'] += len(child['x'])
+        self.predators = _concat(self.predators, *children)
+        return won_sources
+
+    def _breed_predators(self, parents):
+        self.predators['energy'][parents] //= 2
+        self.predators['ssr'][parents] = 0
+
+    def finish(self, predator_parents):
+        """Apply the last cross-tile births; returns this strip's share of the stats and its event counts"""
+        self._breed_predators(predator_parents)
+        rows = slice(self.y0, self.y1)
+        counters, self.counters = self.counters, Counter()
+        return (len(self.prey['x']), int(self.prey['energy'].sum()),
+                len(self.predators['x']), int(self.predators['energy'].sum()),
+                int(np.count_nonzero(self.present[rows] & (self.timer[rows] == 0))), counters)
+
+    def agents(self):
+        return self.prey, self.predators
+
+
+def _serve(connection, tile_args):
+    """Worker process: build the tile, then run the methods the master asks for until told to stop"""
+    tile = _Tile(*tile_args)
+    try:
+        while True:
+            name, args = connection.recv()
+            if name is None:
+                break
+            connection.send(getattr(tile, name)(*args))
+    finally:
+        tile.close()
+
+
+def _shutdown(owner, connections, processes, blocks):
+    # A process forked later inherits this finalizer; only the one that created the world may stop it
+    if os.getpid() != owner:
+        return
+    for connection in connections:
+        try:
+            connection.send((None, ()))
+        except OSError:
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    for shm in blocks:
+        try:
+            shm.close()
+        except BufferError:
+            pass  # Arrays still viewing it; the mapping goes away with them
+        shm.unlink()
+
+
+class PartitionedWorld(World):
+    """Domain-decomposed vectorized engine for very large grids
+
+    The grid is cut into ``tiles`` horizontal strips (one per CPU by
+    default), each stepped by a persistent worker process on its own
+    agents. The occupancy, species and food grids live in shared memory;
+    a strip reads the boundary rows of its neighbours (the halo) and
+    writes only its own rows. Agents crossing a strip boundary migrate
+    through the master between sub-phases (see _Tile).
+
+    Rules are those of NumpyWorld, so the two engines agree statistically.
+    Each strip draws from its own RNG stream spawned from ``seed``, which
+    makes a run reproducible for a fixed seed and tile count (not across
+    tile counts). With processes=False the strips run in-process, which
+    gives the same results and is handy for debugging.
+
+    Call close() (or use the world as a context manager) to stop the
+    workers; they are also stopped when the world is garbage collected.
+    """
+
+    engine = "partitioned"
+
+    def __init__(self, grid_size, initial_prey, initial_predators, prey_reproduce_interval,
+                 predator_reproduce_interval, predator_initial_energy, energy_gain,
+                 energy_loss, food_density=0.1, seed=None, tiles=None, processes=True, perception_radius=0):
+        if perception_radius:
+            raise ValueError("The partitioned engine does not support a perception radius")
+        self.grid_size = grid_size
+        tiles = max(1, min(tiles or os.cpu_count(), grid_size))
+        self.tiles = tiles
+        bounds = (np.arange(tiles + 1) * grid_size) // tiles
+        seeds = spawn(seed, tiles + 1)
+        self.rng = numpy_generator(seeds[0])
+        rng = self.rng
+
+        # Create initial populations, one agent per cell
+        cells = random_cells(rng, grid_size, initial_prey + initial_predators)
+        prey = _agents(cells[:initial_prey] % grid_size, cells[:initial_prey] // grid_size,
+                       initial_prey_energy(rng, initial_prey))
+        predators = _agents(cells[initial_prey:] % grid_size, cells[initial_prey:] // grid_size,
+                            np.full(initial_predators, predator_initial_energy))
+        # Initial ids are the cell indices: unique, and new ids (see _Tile._new_ids) start above them
+        prey['id'] = cells[:initial_prey]
+        predators['id'] = cells[initial_prey:]
+        first_id = grid_size * grid_size
+
+        # Create food sources, indexed by cell
+        num_food = int(grid_size * grid_size * food_density)
+        self.food = FoodField(grid_size, rng.integers(grid_size, size=num_food), rng.integers(grid_size, size=num_food))
+
+        # Shared grids: the food field's arrays are swapped for shared copies
+        shape = (grid_size, grid_size)
+        self.blocks = []
+        grids = {}
+        for attribute, dtype in (('ids', np.int64), ('species', np.int8), ('present', bool), ('timer', np.int64)):
+            shm, array = _shared_array(shape, dtype)
+            self.blocks.append(shm)
+            grids[attribute] = (shm.name, shape, np.dtype(dtype).str)
+            setattr(self, attribute, array)
+        self.ids[:] = EMPTY
+        self.species[:] = NO_AGENT
+        self.ids[prey['y'], prey['x']] = prey['id']
+        self.species[prey['y'], prey['x']] = PREY
+        self.ids[predators['y'], predators['x']] = predators['id']
+        self.species[predators['y'], predators['x']] = PREDATOR
+        self.present[:] = self.food.present
+        self.timer[:] = self.food.time_until_regen
+        self.food.present, self.food.time_until_regen = self.present, self.timer
+
+        params = {
+            'prey_reproduce_interval': prey_reproduce_interval,
+            'predator_reproduce_interval': predator_reproduce_interval,
+            'energy_gain': energy_gain,
+            'energy_loss': energy_loss,
+            'regeneration_time': self.food.regeneration_time,
+        }
+        tile_args = []
+        for tile in range(tiles):
+            y0, y1 = bounds[tile], bounds[tile + 1]
+            tile_args.append((tile, bounds, grid_size, grids, params,
+                              _take(prey, (prey['y'] >= y0) & (prey['y'] < y1)),
+                              _take(predators, (predators['y'] >= y0) & (predators['y'] < y1)),
+                              seeds[tile + 1], first_id))
+
+        self.connections = []
+        self.processes = []
+        self.local_tiles = None
+        self.counters = None  # Event counters, switched on by instrumentation.Instrumentation
+        if processes:
+            for args in tile_args:
+                connection, worker_connection = multiprocessing.Pipe()
+                process = multiprocessing.Process(target=_serve, args=(worker_connection, args), daemon=True)
+                process.start()
+                self.connections.append(connection)
+                self.processes.append(process)
+        else:
+            self.local_tiles = [_Tile(*args) for args in tile_args]
+        self._finalizer = weakref.finalize(self, _shutdown, os.getpid(), self.connections, self.processes,
+                                           self.blocks)
+
+        self._prey_parents = self._predator_parents = [np.zeros(0, dtype=np.int64)] * tiles
+        self._finish()
+
+        # The step is split into named phases so tools can time them individually
+        self.phases = [
+            ('prey_pass', self._prey_pass),
+            ('predator_pass', self._predator_pass),
+            ('finish', self._finish),
+        ]
+
+    def close(self):
+        if self.local_tiles:
+            for tile in self.local_tiles:
+                tile.close()
+            self.local_tiles = []
+        self._finalizer()
+
+    def _call(self, name, args):
+        """Run one tile method on every tile (args: one tuple per tile) and return the results in tile order"""
+        if self.local_tiles is not None:
+            return [getattr(tile, name)(*tile_args) for tile, tile_args in zip(self.local_tiles, args)]
+        for connection, tile_args in zip(self.connections, args):
+            connection.send((name, tile_args))
+        return [connection.recv() for connection in self.connections]
+
+    def _claims(self, propose, resolve, args=None):
+        """One claim round: propose on every tile, route the cross-tile claims, resolve them at their owners
+
+        Returns, per tile, the indices of its claims that won on other tiles.
+        """
+        outgoing = self._call(propose, args or [()] * self.tiles)
+        incoming = [[(source, claims[tile]) for source, claims in enumerate(outgoing) if tile in claims]
+                    for tile in range(self.tiles)]
+        won = self._call(resolve, [(claims,) for claims in incoming])
+        return [np.sort(np.concatenate([np.zeros(0, dtype=np.int64)] +
+                                       [won_sources[tile] for won_sources in won if tile in won_sources]))
+                for tile in range(self.tiles)]
+
+    def step(self):
+        for _, phase in self.phases:
+            phase()
+
+    def _prey_pass(self):
+        emigrated = self._claims('propose_prey_moves', 'resolve_prey_moves')
+        self._call('settle_prey', [(indices,) for indices in emigrated])
+        self._prey_parents = self._claims('propose_prey_births', 'resolve_prey_births')
+
+    def _predator_pass(self):
+        emigrated = self._claims('propose_predator_moves', 'resolve_predator_moves',
+                                 [(parents,) for parents in self._prey_parents])
+        self._call('settle_predators', [(indices,) for indices in emigrated])
+        self._predator_parents = self._claims('propose_predator_births', 'resolve_predator_births')
+
+    def _finish(self):
+        self._partials = self._call('finish', [(parents,) for parents in self._predator_parents])
+        self._predator_parents = [np.zeros(0, dtype=np.int64)] * self.tiles
+        if self.counters is not None:
+            for partial in self._partials:
+                self.counters.update(partial[-1])
+
+    def stats(self):
+        prey_count, prey_energy, predator_count, predator_energy, food = (
+            sum(column) for column in list(zip(*self._partials))[:5])
+        return {
+            'prey_count': prey_count,
+            'predator_count': predator_count,
+            'avg_prey_energy': prey_energy / prey_count if prey_count else 0,
+            'avg_predator_energy': predator_energy / predator_count if predator_count else 0,
+            'available_food': food
+        }
+
+    def frame(self):
+        """Agent coordinate/energy arrays and the food availability grid, for History.append"""
+        groups = self._call('agents', [()] * self.tiles)
+        prey = _concat(*(prey for prey, _ in groups))
+        predators = _concat(*(predators for _, predators in groups))
+        return (prey['x'], prey['y'], prey['energy'],
+                predators['x'], predators['y'], predators['energy'],
+                self.food.available())
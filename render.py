@@ -0,0 +1,68 @@
+import numpy as np
+
+from agents import Prey
+
+# Colour scheme of the simulation view (RGB)
+OCEAN_COLOR = (20, 105, 200)
+FOOD_AVAILABLE_COLOR = (100, 200, 50)  # Light green for available food
+FOOD_CONSUMED_COLOR = (139, 69, 19)    # Brown for consumed food
+
+# Energies at which prey/predators are drawn at full brightness
+PREY_FULL_ENERGY = float(Prey.max_energy)
+PREDATOR_FULL_ENERGY = 50.0  # Reasonable max for predators
+
+# Every colour render_frame can produce, for palette images: index = ocean, food, then one per energy shade
+SHADES = 106  # _shade() values 150..255
+OCEAN_INDEX, FOOD_AVAILABLE_INDEX, FOOD_CONSUMED_INDEX = 0, 1, 2
+PREY_INDEX = 3                       # + shade - 150
+PREDATOR_INDEX = PREY_INDEX + SHADES  # + shade - 150
+_shade_levels = np.arange(150, 150 + SHADES, dtype=np.uint8)
+PALETTE = np.concatenate([
+    np.array([OCEAN_COLOR, FOOD_AVAILABLE_COLOR, FOOD_CONSUMED_COLOR], dtype=np.uint8),
+    np.stack([np.full(SHADES, 50), _shade_levels, np.full(SHADES, 50)], axis=1).astype(np.uint8),
+    np.stack([_shade_levels, np.full(SHADES, 50), np.full(SHADES, 50)], axis=1).astype(np.uint8),
+])
+
+
+def _shade(energy, full_energy):
+    """150..255 channel intensity, brighter for higher energy"""
+    return (150 + 105 * np.minimum(1.0, np.asarray(energy) / full_energy)).astype(np.uint8)
+
+
+def render_frame(grid_size, prey, predators, food, out=None):
+    """RGB image (grid_size x grid_size x 3, uint8) of one step
+
+    prey/predators are frames with x, y and energy arrays and food has
+    present/available grids, as returned by History or Trajectory.
+    Predators are drawn over prey, prey over food. ``out`` may also be an
+    RGBA buffer, in which case only its colour channels are written.
+    """
+    frame = out if out is not None else np.empty((grid_size, grid_size, 3), dtype=np.uint8)
+    rgb = frame[..., :3]
+    rgb[:] = OCEAN_COLOR
+    rgb[food.available] = FOOD_AVAILABLE_COLOR
+    rgb[food.present & ~food.available] = FOOD_CONSUMED_COLOR
+
+    # Prey in bright green, predators in bright red, shaded by energy
+    rgb[prey.y, prey.x, 0] = 50
+    rgb[prey.y, prey.x, 1] = _shade(prey.energy, PREY_FULL_ENERGY)
+    rgb[prey.y, prey.x, 2] = 50
+    rgb[predators.y, predators.x, 0] = _shade(predators.energy, PREDATOR_FULL_ENERGY)
+    rgb[predators.y, predators.x, 1] = 50
+    rgb[predators.y, predators.x, 2] = 50
+    return frame
+
+
+def render_indexed(grid_size, prey, predators, food, out=None):
+    """Palette image (grid_size x grid_size, uint8) of one step; PALETTE[image] equals render_frame()
+
+    One byte per cell instead of three, and already in the form GIF
+    encoders take, so exporters can skip colour quantization.
+    """
+    frame = out if out is not None else np.empty((grid_size, grid_size), dtype=np.uint8)
+    frame[:] = OCEAN_INDEX
+    frame[food.available] = FOOD_AVAILABLE_INDEX
+    frame[food.present & ~food.available] = FOOD_CONSUMED_INDEX
+    frame[prey.y, prey.x] = _shade(prey.energy, PREY_FULL_ENERGY) - 150 + PREY_INDEX
+    frame[predators.y, predators.x] = _shade(predators.energy, PREDATOR_FULL_ENERGY) - 150 + PREDATOR_INDEX
+    return frame
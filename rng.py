@@ -0,0 +1,31 @@
+import random
+
+import numpy as np
+
+
+def seed_sequence(seed=None):
+    """SeedSequence for an int seed, None (fresh OS entropy) or an existing SeedSequence"""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def spawn(seed, count):
+    """Independent child SeedSequences, e.g. one per replicate or worker"""
+    return seed_sequence(seed).spawn(count)
+
+
+def spawn_seeds(seed, count):
+    """Independent 64-bit integer seeds, for when a plain number has to be stored or sent around"""
+    return [int(child.generate_state(1, np.uint64)[0]) for child in spawn(seed, count)]
+
+
+def python_random(seed=None):
+    """random.Random stream owned by one simulation (used by the object engine)"""
+    state = seed_sequence(seed).generate_state(4, np.uint64)
+    return random.Random(int.from_bytes(state.tobytes(), 'little'))
+
+
+def numpy_generator(seed=None):
+    """NumPy Generator owned by one simulation (used by the vectorized engines)"""
+    return np.random.default_rng(seed_sequence(seed))
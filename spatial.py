@@ -0,0 +1,66 @@
+import numpy as np
+
+EMPTY = -1
+
+
+def check_capacity(grid_size, count):
+    """Refuse to place more agents than a grid with one agent per cell can hold"""
+    if count > grid_size * grid_size:
+        raise ValueError(f"Cannot place {count} agents on a {grid_size}x{grid_size} grid, one per cell")
+
+
+class OccupancyGrid:
+    """Single-occupancy lock grid on the torus: the id of the agent in each cell, or EMPTY
+
+    Every move, birth and death goes through the grid, so a cell never
+    holds more than one agent and each check is a single array lookup.
+    """
+
+    # Von Neumann neighbourhood, same directions as Agent.move
+    NEIGHBOUR_OFFSETS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+    def __init__(self, grid_size):
+        self.grid_size = grid_size
+        self.ids = np.full((grid_size, grid_size), EMPTY, dtype=np.int64)
+
+    def occupant(self, x, y):
+        return int(self.ids[y, x])
+
+    def is_free(self, x, y):
+        return self.ids[y, x] == EMPTY
+
+    def place(self, agent_id, x, y):
+        """Put an agent on (x, y); refused (False) if the cell is taken"""
+        if self.ids[y, x] != EMPTY:
+            return False
+        self.ids[y, x] = agent_id
+        return True
+
+    def vacate(self, x, y):
+        self.ids[y, x] = EMPTY
+
+    def move(self, x, y, new_x, new_y):
+        """Move the occupant of (x, y) to (new_x, new_y); refused (False) if that cell is taken"""
+        if self.ids[new_y, new_x] != EMPTY:
+            return False
+        self.ids[new_y, new_x] = self.ids[y, x]
+        self.ids[y, x] = EMPTY
+        return True
+
+    def neighbours(self, x, y):
+        """Cells adjacent to (x, y), wrapping around the torus"""
+        n = self.grid_size
+        return [((x + dx) % n, (y + dy) % n) for dx, dy in self.NEIGHBOUR_OFFSETS]
+
+    def free_neighbours(self, x, y):
+        ids = self.ids
+        return [(nx, ny) for nx, ny in self.neighbours(x, y) if ids[ny, nx] == EMPTY]
+
+    def __contains__(self, position):
+        """Whether (x, y) is occupied"""
+        x, y = position
+        return self.ids[y, x] != EMPTY
+
+    def __len__(self):
+        return int(np.count_nonzero(self.ids != EMPTY))
+
@@ -0,0 +1,329 @@
+import numpy as np
+
+from agents import FoodField, Prey
+from headless import DEFAULT_PARAMS, run_simulation
+from rng import numpy_generator, spawn_seeds
+
+# Per-run inputs of the model, as simulate()'s parameter names
+INPUTS = ('grid_size', 'initial_prey', 'initial_predators', 'prey_reproduce_interval',
+          'predator_reproduce_interval', 'predator_initial_energy', 'energy_gain', 'energy_loss',
+          'food_density', 'max_steps')
+
+# Correction factors fitted by calibrate(), for what the mean field misses (mostly spatial clustering)
+SCALES = ('encounter', 'prey_birth', 'predator_birth')
+
+EXTINCTION_WEIGHT = 5.0        # Calibration loss per unit of extinction disagreement (1 = every run wrong)
+EXTINCT_BELOW = 2               # Expected head count under which a species counts as gone (a pair rarely recovers)
+
+
+def _table(points, base_params=None):
+    """Parameter arrays over a batch of configurations, defaults filled in"""
+    points = [{**DEFAULT_PARAMS, **(base_params or {}), **point} for point in points]
+    return {name: np.array([point[name] for point in points]) for name in INPUTS}
+
+
+def _shift(h, d):
+    """Energy histograms (one row per configuration) with every energy moved by d bins, d per configuration
+
+    Mass pushed below bin 0 is dropped (dead); mass pushed past the top
+    bin piles up in it.
+    """
+    batch, bins = h.shape
+    d = np.broadcast_to(np.asarray(d, dtype=np.int64), (batch,))[:, None]
+    source = np.arange(bins) - d
+    out = np.take_along_axis(h, np.clip(source, 0, bins - 1), axis=1) * ((source >= 0) & (source < bins))
+    # The top bin collects everything from bins - 1 - d upwards
+    cumulative = np.cumsum(h, axis=1)
+    below = np.take_along_axis(cumulative, np.clip(bins - 2 - d, 0, bins - 1), axis=1)[:, 0] * (bins - 2 - d[:, 0] >= 0)
+    out[:, -1] = np.where(d[:, 0] > 0, cumulative[:, -1] - below, out[:, -1])
+    return out
+
+
+def _age(h, interval):
+    """Advance steps_since_reproduce (one row per configuration) by one; past the interval stays ready"""
+    aged = np.zeros_like(h)
+    aged[:, 1:] = h[:, :-1]
+    over = np.arange(h.shape[1]) > interval[:, None]
+    aged[np.arange(len(h)), interval] += (aged * over).sum(axis=1)
+    aged[over] = 0
+    return aged
+
+
+def _halve(h):
+    """Energy histograms with every energy e moved to e // 2"""
+    bins = h.shape[-1]
+    padded = np.concatenate([h, np.zeros(h.shape[:-1] + (bins % 2,))], axis=-1)
+    out = np.zeros_like(h)
+    out[..., :(bins + 1) // 2] = padded[..., 0::2] + padded[..., 1::2]
+    return out
+
+
+def _scale(factor, *histograms):
+    """Multiply each configuration's histograms by its factor, in place"""
+    for h in histograms:
+        h *= factor[:, None]
+
+
+def mean_field(table, steps, scales):
+    """Expected population statistics of a batch of configurations, step by step
+
+    A difference-equation version of the step rules: each species is an
+    expected head count per energy bin and per steps_since_reproduce
+    (treated as independent), moved through the same phases as the
+    engines. Space enters only through densities: a prey stands on
+    available food with the probability that a cell holds some, a
+    predator has prey next to it with probability 1 - (1 - prey
+    density)^4, and a newborn finds a free neighbour with probability
+    1 - occupancy^4. ``scales`` correct the encounter and birth rates for
+    what that leaves out.
+
+    Returns {stat: (steps + 1, batch) array}, with the same keys as stats().
+    """
+    batch = len(table['grid_size'])
+    rows = np.arange(batch)
+    cells = table['grid_size'].astype(float) ** 2
+    # Whole numbers as the engines see them: an agent is ready once ssr >= interval, energies are int64
+    prey_interval = np.ceil(table['prey_reproduce_interval']).astype(np.int64)
+    predator_interval = np.ceil(table['predator_reproduce_interval']).astype(np.int64)
+    initial_energy = table['predator_initial_energy'].astype(np.int64)
+    gain, loss = table['energy_gain'].astype(np.int64), table['energy_loss'].astype(np.int64)
+    encounter, prey_birth, predator_birth = (np.broadcast_to(np.asarray(scales[name], dtype=float), (batch,))
+                                             for name in SCALES)
+
+    # Prey energies 0..Prey.max_energy; predators up to a few meals above their start, the rest piles at the top
+    prey_energy = np.arange(Prey.max_energy + 1)
+    predator_energy = np.arange(int((initial_energy + 3 * gain).max()) + 1)
+    low, high = Prey.initial_energy
+    prey = np.zeros((batch, len(prey_energy)))
+    prey[:, low:high + 1] = table['initial_prey'][:, None] / (high - low + 1)
+    prey_age = np.zeros((batch, prey_interval.max() + 1))
+    prey_age[:, 0] = table['initial_prey']
+    predators = np.zeros((batch, len(predator_energy)))
+    predators[rows, initial_energy] = table['initial_predators']
+    predator_age = np.zeros((batch, predator_interval.max() + 1))
+    predator_age[:, 0] = table['initial_predators']
+    predator_fertile = predator_energy > 10 * loss[:, None]
+    prey_fertile = max(Prey.min_reproduce_energy, 2 * Prey.reproduction_cost)
+
+    # Food placed at int(cells * density) random cells, collisions collapsing; eaten food returns after the countdown
+    food = cells * (1 - (1 - 1 / cells) ** np.floor(cells * table['food_density']))
+    returning = np.zeros((batch, FoodField.regeneration_time))
+
+    series = {name: np.zeros((steps + 1, batch)) for name in
+              ('prey_count', 'predator_count', 'avg_prey_energy', 'avg_predator_energy', 'available_food')}
+
+    def record(step, prey_count, predator_count):
+        series['prey_count'][step] = prey_count
+        series['predator_count'][step] = predator_count
+        series['avg_prey_energy'][step] = np.divide(prey @ prey_energy, prey_count,
+                                                    out=np.zeros(batch), where=prey_count > 0)
+        series['avg_predator_energy'][step] = np.divide(predators @ predator_energy, predator_count,
+                                                        out=np.zeros(batch), where=predator_count > 0)
+        series['available_food'][step] = food
+
+    def survivors(before, after):
+        return np.divide(after, before, out=np.zeros(batch), where=before > 0)
+
+    def births(energy, age, interval, fertile, room):
+        """Parents per energy bin: the ready share of every fertile bin, times the chance of a free cell"""
+        count = age.sum(axis=1)
+        ready = np.divide(age[rows, interval], count, out=np.zeros(batch), where=count > 0)
+        parents = energy * fertile * (ready * room)[:, None]
+        born = parents.sum(axis=1)
+        age[rows, interval] -= born
+        age[:, 0] += 2 * born  # Parent and child both start counting again
+        return parents
+
+    prey_count, predator_count = prey.sum(axis=1), predators.sum(axis=1)
+    record(0, prey_count, predator_count)
+    for step in range(1, steps + 1):
+        # Food regeneration
+        slot = step % FoodField.regeneration_time
+        food = food + returning[:, slot]
+
+        # Prey pass: lose energy, forage (on food, or naturally), die at 0, then reproduce
+        on_food = food / cells
+        natural = (1 - on_food) * Prey.natural_food_chance
+        prey = (on_food[:, None] * _shift(prey, Prey.energy_gain_from_food - Prey.energy_loss_per_step) +
+                natural[:, None] * _shift(prey, Prey.natural_food_energy - Prey.energy_loss_per_step) +
+                (1 - on_food - natural)[:, None] * _shift(prey, -Prey.energy_loss_per_step))
+        prey[:, 0] = 0
+        alive = prey.sum(axis=1)
+        _scale(survivors(prey_count, alive), prey_age)
+        prey_age = _age(prey_age, prey_interval)
+
+        room = np.minimum(1.0, prey_birth * (1 - ((alive + predator_count) / cells) ** 4))
+        parents = births(prey, prey_age, prey_interval, prey_energy >= prey_fertile, room)
+        prey -= parents
+        prey[:, :-Prey.reproduction_cost] += parents[:, Prey.reproduction_cost:]
+        prey[:, Prey.reproduction_cost] += parents.sum(axis=1)
+        prey_count = prey.sum(axis=1)
+
+        # Food consumption: every prey standing on available food eats it
+        eaten = np.minimum(food, prey_count * on_food)
+        food = food - eaten
+        returning[:, slot] = eaten
+
+        # Predator pass: hunt an adjacent prey or wander, lose energy, die at 0, then reproduce by splitting
+        adjacent = 1 - (1 - prey_count / cells) ** 4
+        kills = np.minimum(np.minimum(1.0, encounter * adjacent) * predator_count, prey_count)
+        fed = np.divide(kills, predator_count, out=np.zeros(batch), where=predator_count > 0)[:, None]
+        _scale(survivors(prey_count, prey_count - kills), prey, prey_age)
+        predators = fed * _shift(predators, gain - loss) + (1 - fed) * _shift(predators, -loss)
+        predators[:, 0] = 0
+        alive = predators.sum(axis=1)
+        _scale(survivors(predator_count, alive), predator_age)
+        predator_age = _age(predator_age, predator_interval)
+
+        prey_count = prey.sum(axis=1)
+        room = np.minimum(1.0, predator_birth * (1 - ((prey_count + alive) / cells) ** 4))
+        parents = births(predators, predator_age, predator_interval, predator_fertile, room)
+        predators += 2 * _halve(parents) - parents
+        predator_count = predators.sum(axis=1)
+
+        # A species whose expected head count drops below EXTINCT_BELOW is gone for good
+        for count, histograms in ((prey_count, (prey, prey_age)), (predator_count, (predators, predator_age))):
+            _scale((count >= EXTINCT_BELOW).astype(float), *histograms)
+        prey_count, predator_count = prey.sum(axis=1), predators.sum(axis=1)
+        record(step, prey_count, predator_count)
+    return series
+
+
+def survival(series):
+    """Steps until prey or predators die out in each predicted run (the run length if neither does)"""
+    extinct = (series['prey_count'] < EXTINCT_BELOW) | (series['predator_count'] < EXTINCT_BELOW)
+    steps = len(extinct) - 1
+    return np.where(extinct.any(axis=0), extinct.argmax(axis=0), steps)
+
+
+class Surrogate:
+    """Mean-field stand-in for the agent simulation, for prescreening sweeps
+
+    ``predict`` runs mean_field for many configurations at once, in
+    milliseconds per configuration instead of seconds. Fit its SCALES to
+    agent runs with ``calibrate`` (or build one with calibrated_surrogate);
+    ``calibration_error`` then reports how far it is from them. The model
+    ignores perception_radius.
+    """
+
+    def __init__(self, scales=None):
+        self.scales = {name: 1.0 for name in SCALES}
+        self.scales.update(scales or {})
+        self.calibration_error = None
+
+    def predict(self, points, base_params=None, steps=None):
+        """Predicted series for each design point, as {stat: (steps + 1, points) array}"""
+        table = _table(points, base_params)
+        return mean_field(table, steps or int(table['max_steps'].max()), self.scales)
+
+    def calibrate(self, results, candidates=64, rounds=3, seed=0):
+        """Fit SCALES to agent runs (headless Results) by shrinking random searches in log space
+
+        Minimizes the mean squared error of log(1 + count) over both
+        species and every recorded step, plus EXTINCTION_WEIGHT times the
+        share of runs whose extinction the model gets wrong. Candidates
+        that agree on extinction less often than the starting scales are
+        never taken, since rank() orders points by predicted survival.
+        Sets and returns ``calibration_error``, alongside the error of the
+        uncalibrated model.
+        """
+        table = _table([result.params for result in results])
+        steps = max(len(result) for result in results) - 1
+        observed = {name: _padded(results, name, steps) for name in ('prey_count', 'predator_count')}
+        recorded = np.arange(steps + 1)[:, None] < np.array([len(result) for result in results])
+        observed_extinct = np.array([result.extinct for result in results])
+
+        def losses(log_scales):
+            """Loss and extinction agreement of every candidate (rows of log_scales), in one batch"""
+            count = len(log_scales)
+            batch = {name: np.tile(values, count) for name, values in table.items()}
+            scales = {name: np.repeat(np.exp(log_scales[:, i]), len(results)) for i, name in enumerate(SCALES)}
+            predicted = mean_field(batch, steps, scales)
+            squared = 0.0
+            for name, values in observed.items():
+                error = (np.log1p(predicted[name]) - np.log1p(np.tile(values, count))) ** 2
+                squared = squared + (error * np.tile(recorded, count)).reshape(steps + 1, count, len(results)).sum(
+                    axis=(0, 2))
+            agreement = (_extinct(predicted, np.tile(recorded, count)) ==
+                         np.tile(observed_extinct, count)).reshape(count, len(results)).mean(axis=1)
+            return squared / (2 * recorded.sum()) + EXTINCTION_WEIGHT * (1 - agreement), agreement
+
+        rng = numpy_generator(seed)
+        best = np.log([self.scales[name] for name in SCALES])
+        (best_loss,), (floor,) = losses(best[None])
+        width = 1.5
+        for _ in range(rounds):
+            trials = best + rng.uniform(-width, width, size=(candidates, len(SCALES)))
+            trial_losses, agreement = losses(trials)
+            trial_losses[agreement < floor] = np.inf
+            if trial_losses.min() < best_loss:
+                best, best_loss = trials[trial_losses.argmin()], trial_losses.min()
+            width /= 3
+        self.scales = dict(zip(SCALES, np.exp(best).tolist()))
+        self.calibration_error = self.error(results)
+        self.calibration_error['uncalibrated'] = Surrogate().error(results)
+        return self.calibration_error
+
+    def error(self, results):
+        """How far predictions are from agent runs: RMSE of log(1 + count), and extinction agreement"""
+        steps = max(len(result) for result in results) - 1
+        predicted = self.predict([result.params for result in results], steps=steps)
+        lengths = np.array([len(result) for result in results])
+        recorded = np.arange(steps + 1)[:, None] < lengths
+        error = {'runs': len(results)}
+        for name in ('prey_count', 'predator_count'):
+            squared = (np.log1p(predicted[name]) - np.log1p(_padded(results, name, steps))) ** 2
+            error[f'rmse_log_{name}'] = float(np.sqrt((squared * recorded).sum() / recorded.sum()))
+        observed_extinct = np.array([result.extinct for result in results])
+        error['extinction_agreement'] = float(np.mean(_extinct(predicted, recorded) == observed_extinct))
+        return error
+
+    def rank(self, design, base_params=None, steps=None):
+        """Design points ordered from most to least promising, with their predicted summaries
+
+        Points are ranked by predicted survival time, then by predicted
+        mean predator count (populations that stay larger are harder to
+        tip into extinction).
+        """
+        series = self.predict(design, base_params, steps)
+        survived = survival(series)
+        mean_prey = series['prey_count'].mean(axis=0)
+        mean_predators = series['predator_count'].mean(axis=0)
+        order = np.lexsort((-mean_predators, -survived))
+        return [{'point': design[i], 'survival': int(survived[i]),
+                 'mean_prey': float(mean_prey[i]), 'mean_predators': float(mean_predators[i])} for i in order]
+
+    def prescreen(self, design, base_params=None, keep=0.25, min_survival=None):
+        """The part of a design worth full agent runs, best first
+
+        Keeps the top ``keep`` fraction of the ranking; with min_survival,
+        keeps every point predicted to last at least that many steps instead.
+        """
+        ranking = self.rank(design, base_params)
+        if min_survival is not None:
+            return [entry['point'] for entry in ranking if entry['survival'] >= min_survival]
+        return [entry['point'] for entry in ranking[:max(1, int(round(len(ranking) * keep)))]]
+
+
+def _extinct(series, recorded):
+    """Whether each predicted run dies out within its recorded steps (a (steps + 1, runs) mask)"""
+    gone = (series['prey_count'] < EXTINCT_BELOW) | (series['predator_count'] < EXTINCT_BELOW)
+    return (gone & recorded).any(axis=0)
+
+
+def _padded(results, name, steps):
+    """(steps + 1, runs) array of one series, zero past each run's end"""
+    values = np.zeros((steps + 1, len(results)))
+    for i, result in enumerate(results):
+        values[:len(result), i] = getattr(result, name)
+    return values
+
+
+def calibrated_surrogate(points, replicates=2, base_params=None, seed=0, **calibration):
+    """Run a few agent simulations of the given points and calibrate a Surrogate against them"""
+    seeds = iter(spawn_seeds(seed, len(points) * replicates))
+    results = [run_simulation({**(base_params or {}), **point}, next(seeds))
+               for point in points for _ in range(replicates)]
+    surrogate = Surrogate()
+    surrogate.calibrate(results, seed=seed, **calibration)
+    return surrogate
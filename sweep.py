@@ -0,0 +1,139 @@
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from checkpoint import RATE_PARAMS
+from convergence import ConvergenceDetector
+from headless import DEFAULT_PARAMS, SERIES, run_simulation
+from rng import numpy_generator, spawn_seeds
+
+SUMMARY_FIELDS = ('extinction_step', 'prey_amplitude', 'predator_amplitude', 'mean_prey', 'mean_predators',
+                  'regime', 'period')
+
+
+def grid_design(space):
+    """Every combination of the listed values, e.g. {'food_density': [0.1, 0.5], 'grid_size': [50, 100]}"""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def latin_hypercube(ranges, samples, seed=None):
+    """Latin-hypercube design over {'name': (low, high)} ranges
+
+    Each range is split into ``samples`` equal strata and every stratum is
+    used exactly once per parameter. Parameters whose bounds are both ints
+    are rounded to ints.
+    """
+    rng = numpy_generator(seed)
+    design = [{} for _ in range(samples)]
+    for name, (low, high) in ranges.items():
+        points = (rng.permutation(samples) + rng.random(samples)) / samples
+        values = low + points * (high - low)
+        for point, value in zip(design, values):
+            point[name] = int(round(value)) if isinstance(low, int) and isinstance(high, int) else float(value)
+    return design
+
+
+def summarize(result):
+    """Summary metrics of one run, from its population series"""
+    prey, predators = result.prey_count, result.predator_count
+    extinct = np.flatnonzero((prey == 0) | (predators == 0))
+    # Oscillation amplitude is measured on the second half, after the initial transient
+    half = len(prey) // 2
+    return {
+        'extinction_step': int(result.steps[extinct[0]]) if len(extinct) else -1,
+        'prey_amplitude': float(np.ptp(prey[half:])) / 2,
+        'predator_amplitude': float(np.ptp(predators[half:])) / 2,
+        'mean_prey': float(prey.mean()),
+        'mean_predators': float(predators.mean()),
+        'regime': result.regime or '',
+        'period': result.period or -1,
+    }
+
+
+def _run_one(task):
+    params, seed, convergence, cache, checkpoint = task
+    if cache is not None:
+        result = cache.run(params, seed, convergence, checkpoint=checkpoint)
+    else:
+        detector = ConvergenceDetector(**convergence) if convergence is not None else None
+        result = run_simulation(params, seed, convergence=detector, checkpoint=checkpoint)
+    return result.columns(), summarize(result)
+
+
+def run_sweep(design, replicates=1, base_params=None, seed=0, max_workers=None, output_path=None,
+              convergence=None, cache=None, checkpoint=None):
+    """Run every design point ``replicates`` times across a process pool
+
+    Each replicate gets its own seed drawn from ``seed``, so the whole sweep
+    is reproducible. Returns the collected results (see ``load_sweep``) and,
+    if output_path is given, also writes them to a single .npz file.
+    convergence is a dict of ConvergenceDetector settings ({} for the
+    defaults); when given, each run stops as soon as its regime is known.
+    With a ResultCache, runs already in the cache are not simulated again.
+    With a Checkpoint, every run forks from its saved world on its own
+    random stream, so a shared burn-in is simulated only once; the design
+    may then only vary the rates in checkpoint.RATE_PARAMS.
+    """
+    if checkpoint is not None:
+        fixed = {name for point in design for name in point} - set(RATE_PARAMS) - {'max_steps'}
+        if fixed:
+            raise ValueError(f"Runs forked from a checkpoint cannot vary {', '.join(sorted(fixed))}")
+    base_params = {**DEFAULT_PARAMS, **(base_params or {})}
+    runs = []
+    seeds = iter(spawn_seeds(seed, len(design) * replicates))
+    for point_index, point in enumerate(design):
+        for replicate in range(replicates):
+            runs.append((point_index, replicate, {**base_params, **point}, next(seeds)))
+
+    max_workers = max_workers or os.cpu_count()
+    chunksize = max(1, len(runs) // (max_workers * 4))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        tasks = [(params, run_seed, convergence, cache, checkpoint) for _, _, params, run_seed in runs]
+        outputs = list(pool.map(_run_one, tasks, chunksize=chunksize))
+
+    results = _collect(runs, outputs)
+    if output_path:
+        np.savez_compressed(output_path, **results)
+    return results
+
+
+def _collect(runs, outputs):
+    """Pack per-run series and summaries into flat arrays
+
+    Series columns are step numbers, NaN-padded on both sides: runs
+    forked from a checkpoint start at its step (``start_step``) rather
+    than at column 0, so they line up with runs started afresh.
+    """
+    length = np.array([len(columns['step']) for columns, _ in outputs], dtype=np.int64)
+    start_step = np.array([columns['step'][0] if len(columns['step']) else 0 for columns, _ in outputs],
+                          dtype=np.int64)
+    width = int((start_step + length).max()) if len(length) else 0
+    results = {
+        'point': np.array([point for point, _, _, _ in runs]),
+        'replicate': np.array([replicate for _, replicate, _, _ in runs]),
+        'seed': np.array([run_seed for _, _, _, run_seed in runs], dtype=np.uint64),
+        'params': np.array(json.dumps([params for _, _, params, _ in runs])),
+        'start_step': start_step,
+        'length': length,
+    }
+    for name in SUMMARY_FIELDS:
+        results[name] = np.array([summary[name] for _, summary in outputs])
+    for name in SERIES:
+        series = np.full((len(outputs), width), np.nan)
+        for row, (columns, _) in enumerate(outputs):
+            start = start_step[row]
+            series[row, start:start + len(columns[name])] = columns[name]
+        results[name] = series
+    return results
+
+
+def load_sweep(path):
+    """Read a results file written by run_sweep; 'params' comes back as a list of dicts"""
+    with np.load(path) as data:
+        results = {name: data[name] for name in data.files}
+    results['params'] = json.loads(str(results['params']))
+    return results
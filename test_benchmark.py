@@ -0,0 +1,16 @@
+"""The step-loop benchmark reports every phase and refuses empty runs"""
+import pytest
+
+from benchmark import benchmark_case, scaling_params
+
+
+def test_benchmark_case_reports_per_step_phases():
+    case = benchmark_case(scaling_params(30, 0.5), 'numpy', 3, measure_memory=False)
+    assert 1 <= case['steps'] <= 3
+    assert 'stats' in case['phase_seconds_per_step']
+    assert case['final_prey'] >= 0 and case['steps_per_sec'] > 0
+
+
+def test_benchmark_case_needs_a_step():
+    with pytest.raises(ValueError):
+        benchmark_case(scaling_params(30, 0.5), 'numpy', 0)
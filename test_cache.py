@@ -0,0 +1,58 @@
+"""The result cache serves identical results, keys on everything that affects a run, and evicts LRU"""
+import os
+
+import numpy as np
+
+import cache
+from cache import ResultCache
+from headless import DEFAULT_PARAMS, SERIES
+
+PARAMS = {'engine': 'numpy', 'grid_size': 30, 'initial_prey': 200, 'initial_predators': 20, 'max_steps': 20}
+
+
+def test_hit_returns_an_identical_result(tmp_path, monkeypatch):
+    results = ResultCache(str(tmp_path))
+    first = results.run(PARAMS, seed=1)
+
+    def no_run(*args, **kwargs):
+        raise AssertionError("a cached run was simulated again")
+
+    monkeypatch.setattr(cache, 'run_simulation', no_run)
+    second = results.run(PARAMS, seed=1)
+    assert second.params == first.params and second.seed == first.seed
+    np.testing.assert_array_equal(second.steps, first.steps)
+    for name in SERIES:
+        np.testing.assert_array_equal(getattr(second, name), getattr(first, name))
+        assert getattr(second, name).dtype == getattr(first, name).dtype
+
+
+def test_key_changes_with_every_input(tmp_path, monkeypatch):
+    results = ResultCache(str(tmp_path))
+    base = results.key(PARAMS, 1)
+    # Defaults are filled in, so spelling one out does not change the key
+    assert results.key({**PARAMS, 'food_density': DEFAULT_PARAMS['food_density']}, 1) == base
+    keys = {base, results.key(PARAMS, 2), results.key(PARAMS, 1, convergence={})}
+    for name, value in DEFAULT_PARAMS.items():
+        changed = 'object' if name == 'engine' else value * 2 + 1
+        keys.add(results.key({**PARAMS, name: changed}, 1))
+    monkeypatch.setattr(cache, 'ENGINE_VERSION', cache.ENGINE_VERSION + 1)
+    keys.add(results.key(PARAMS, 1))
+    assert len(keys) == 3 + len(DEFAULT_PARAMS) + 1
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path):
+    results = ResultCache(str(tmp_path))
+    for seed in (1, 2, 3):
+        results.run(PARAMS, seed=seed)
+    entry_size = results.size() // 3
+    paths = {seed: os.path.join(str(tmp_path), results.key(PARAMS, seed) + '.npz') for seed in (1, 2, 3)}
+    # Ages: seed 2 oldest, then seed 1, seed 3 most recent; a hit on seed 1 refreshes it
+    for age, seed in enumerate((2, 1, 3)):
+        os.utime(paths[seed], (1000 + age, 1000 + age))
+    assert results.get(PARAMS, 1) is not None
+
+    results.max_bytes = 2 * entry_size + entry_size // 2
+    results.evict()
+    assert results.get(PARAMS, 2) is None
+    assert results.get(PARAMS, 1) is not None and results.get(PARAMS, 3) is not None
+    assert len(results) == 2 and results.size() <= results.max_bytes
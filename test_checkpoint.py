@@ -0,0 +1,35 @@
+"""A run resumed from a checkpoint continues exactly like one that never stopped"""
+import numpy as np
+import pytest
+
+from checkpoint import load
+from headless import run_simulation
+from history import SERIES
+from sweep import run_sweep
+
+PARAMS = {'grid_size': 40, 'initial_prey': 400, 'initial_predators': 20, 'max_steps': 40}
+
+
+@pytest.mark.parametrize('engine', ['object', 'numpy'])
+def test_resume_matches_straight_run(engine, tmp_path):
+    params = {**PARAMS, 'engine': engine}
+    straight = run_simulation(params, seed=5)
+    path = str(tmp_path / 'run.ckpt')
+    run_simulation({**params, 'max_steps': 15}, seed=5, checkpoint_path=path)
+    resumed = run_simulation(params, checkpoint=load(path))
+    assert resumed.steps[0] == 15
+    np.testing.assert_array_equal(resumed.steps, straight.steps[15:])
+    for name in SERIES:
+        np.testing.assert_array_equal(getattr(resumed, name), getattr(straight, name)[15:])
+
+
+
+def test_forked_sweep_runs_start_at_the_checkpoint_step(tmp_path):
+    params = {**PARAMS, 'engine': 'numpy'}
+    path = str(tmp_path / 'burn_in.ckpt')
+    burn_in = run_simulation({**params, 'max_steps': 15}, seed=5, checkpoint_path=path)
+    results = run_sweep([{'energy_gain': 15}, {'energy_gain': 25}], base_params=params, checkpoint=load(path),
+                        max_workers=2)
+    np.testing.assert_array_equal(results['start_step'], [15, 15])
+    assert np.isnan(results['prey_count'][:, :15]).all()
+    np.testing.assert_array_equal(results['prey_count'][:, 15], burn_in.prey_count[-1])
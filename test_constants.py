@@ -0,0 +1,40 @@
+"""Species constants live on Prey and FoodField, and every engine reads them from there"""
+import numpy as np
+
+from agents import FoodField, Prey
+from ensemble import EnsembleWorld
+from headless import DEFAULT_PARAMS
+from numpy_world import forage, prey_ready
+from world import create_world
+
+WORLD_PARAMS = {name: value for name, value in DEFAULT_PARAMS.items() if name not in ('max_steps', 'engine')}
+
+
+def test_prey_rules_follow_the_prey_class(monkeypatch):
+    monkeypatch.setattr(Prey, 'energy_gain_from_food', 7)
+    monkeypatch.setattr(Prey, 'min_reproduce_energy', 20)
+    rng = np.random.default_rng(0)
+    np.testing.assert_array_equal(forage(np.array([10]), np.array([True]), rng), [10 - Prey.energy_loss_per_step + 7])
+    np.testing.assert_array_equal(prey_ready(np.array([19, 20]), np.array([9, 9]), 5), [False, True])
+
+    # The object engine's Prey.step picks up the same value
+    world = create_world('object', seed=1, **WORLD_PARAMS)
+    prey = world.prey_list[0]
+    world.food.present[:] = True
+    prey.energy = 10
+    prey.step(world.grid_size, 100, food_positions=world.food)
+    assert prey.energy == 10 - Prey.energy_loss_per_step + 7
+
+
+def test_food_regeneration_follows_the_food_field_class(monkeypatch):
+    monkeypatch.setattr(FoodField, 'regeneration_time', 4)
+    assert FoodField(5).regeneration_time == 4
+    assert FoodField(5, regeneration_time=2).regeneration_time == 2
+    for engine in ('object', 'numpy'):
+        assert create_world(engine, seed=1, **WORLD_PARAMS).food.regeneration_time == 4
+
+    world = EnsembleWorld(2, seed=1, **WORLD_PARAMS)
+    world.food_present[:] = True
+    world._consume_food()
+    prey_cells = world.food_timer[world.prey_r, world.prey_y, world.prey_x]
+    assert (prey_cells == 4).all()
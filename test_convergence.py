@@ -0,0 +1,49 @@
+"""The convergence detector tells settled, cycling and still-changing populations apart"""
+import numpy as np
+
+from convergence import EQUILIBRIUM, EXTINCTION, PERIODIC, ConvergenceDetector
+
+
+def _feed(detector, prey, predators):
+    """Update the detector step by step; returns the regime and the step it was reported at (or None, None)"""
+    for step, (prey_count, predator_count) in enumerate(zip(prey, predators)):
+        regime = detector.update({'prey_count': prey_count, 'predator_count': predator_count})
+        if regime is not None:
+            return regime, step
+    return None, None
+
+
+def test_constant_series_is_equilibrium():
+    rng = np.random.default_rng(0)
+    steps = 600
+    prey = 500 + rng.normal(0, 5, steps)
+    predators = 120 + rng.normal(0, 2, steps)
+    detector = ConvergenceDetector(window=200)
+    regime, step = _feed(detector, prey, predators)
+    assert regime == EQUILIBRIUM
+    assert step == detector.step and step >= 199  # Never before the window is full
+
+
+def test_periodic_series_reports_its_period():
+    t = np.arange(800)
+    prey = 500 + 200 * np.sin(2 * np.pi * t / 40)
+    predators = 150 + 60 * np.sin(2 * np.pi * (t - 10) / 40)
+    detector = ConvergenceDetector(window=200)
+    regime, _ = _feed(detector, prey, predators)
+    assert regime == PERIODIC
+    assert abs(detector.period - 40) <= 1
+
+
+def test_drifting_series_is_not_converged():
+    t = np.arange(800)
+    prey = 200 + 2.0 * t  # Steady growth, no plateau and no cycle
+    predators = 100 + 0.5 * t
+    detector = ConvergenceDetector(window=200)
+    assert _feed(detector, prey, predators) == (None, None)
+    assert detector.regime is None
+
+
+def test_extinction_is_reported_immediately():
+    prey = [50, 30, 10, 0, 0]
+    predators = [20, 25, 30, 30, 28]
+    assert _feed(ConvergenceDetector(window=200), prey, predators) == (EXTINCTION, 3)
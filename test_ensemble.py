@@ -0,0 +1,35 @@
+"""Ensemble runs report their engine and stop stepping replicates once they have ended"""
+import numpy as np
+
+from ensemble import EnsembleWorld, run_ensemble
+from headless import DEFAULT_PARAMS
+from spatial import EMPTY
+
+PARAMS = {'grid_size': 30, 'initial_prey': 150, 'initial_predators': 60, 'max_steps': 200}
+
+
+def test_result_reports_the_ensemble_engine():
+    result = run_ensemble(PARAMS, replicates=4, seed=1)
+    assert result.params['engine'] == 'ensemble'
+    assert result.replicate(0).params['engine'] == 'ensemble'
+
+
+def test_ended_replicates_are_retired():
+    result = run_ensemble(PARAMS, replicates=8, seed=3)
+    assert result.extinct.any()
+
+    # Same run step by step, looking at the world itself
+    params = {name: value for name, value in {**DEFAULT_PARAMS, **PARAMS}.items()
+              if name not in ('max_steps', 'engine')}
+    world = EnsembleWorld(8, seed=3, **params)
+    ended = np.zeros(8, dtype=bool)
+    for _ in range(len(result) - 1):
+        world.step()
+        stats = world.stats()
+        newly_extinct = ~ended & ((stats['prey_count'] == 0) | (stats['predator_count'] == 0))
+        world.retire(newly_extinct)
+        ended |= newly_extinct
+        retired = np.flatnonzero(ended)
+        assert not np.isin(world.prey_r, retired).any() and not np.isin(world.predator_r, retired).any()
+        assert np.count_nonzero(world.ids != EMPTY) == len(world.prey_r) + len(world.predator_r)
+    np.testing.assert_array_equal(ended, result.extinct)
@@ -0,0 +1,47 @@
+"""Palette frames draw exactly what render_frame does, and exports write one frame per kept step"""
+import numpy as np
+import pytest
+
+from export import export
+from headless import run_simulation
+from history import AgentFrame
+from render import PALETTE, PREDATOR_FULL_ENERGY, PREY_FULL_ENERGY, render_frame, render_indexed
+from trajectory import Trajectory
+
+PARAMS = {'engine': 'numpy', 'grid_size': 40, 'initial_prey': 400, 'initial_predators': 20, 'max_steps': 20}
+
+
+@pytest.fixture
+def trajectory(tmp_path):
+    path = str(tmp_path / 'run.traj')
+    run_simulation(PARAMS, seed=3, trajectory_path=path)
+    return Trajectory(path)
+
+
+def test_indexed_frames_match_rgb_frames(trajectory):
+    n = trajectory.grid_size
+    for step in range(len(trajectory)):
+        frame = trajectory.frame_at(step)
+        np.testing.assert_array_equal(PALETTE[render_indexed(n, *frame)], render_frame(n, *frame))
+
+
+def test_indexed_frames_match_over_the_whole_energy_range(trajectory):
+    prey, predators, food = trajectory.frame_at(0)
+    # Energies from none to well past full brightness, so every shade and the clipping are drawn
+    prey = AgentFrame(prey.x, prey.y, np.linspace(0, 2 * PREY_FULL_ENERGY, len(prey.x)).astype(int))
+    predators = AgentFrame(predators.x, predators.y, np.linspace(0, 2 * PREDATOR_FULL_ENERGY, len(predators.x)).astype(int))
+    n = trajectory.grid_size
+    np.testing.assert_array_equal(PALETTE[render_indexed(n, prey, predators, food)], render_frame(n, prey, predators, food))
+
+
+def test_gif_has_one_frame_per_kept_step(trajectory, tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    path = str(tmp_path / 'run.gif')
+    written = export(trajectory, path, stride=3, scale=2, max_workers=2)
+    assert written == len(range(0, len(trajectory), 3))
+    with Image.open(path) as gif:
+        assert gif.n_frames == written
+        assert gif.size == (2 * trajectory.grid_size,) * 2
+        first = np.asarray(gif.convert('RGB'))
+    expected = render_frame(trajectory.grid_size, *trajectory.frame_at(0))
+    np.testing.assert_array_equal(first, expected.repeat(2, axis=0).repeat(2, axis=1))
@@ -0,0 +1,44 @@
+"""Profiling records stay on the run's step numbers, also after a checkpoint resume"""
+import matplotlib
+
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+
+from checkpoint import load
+from headless import run_simulation
+from history import History
+from instrumentation import Instrumentation
+from viewer import SimulationViewer
+
+PARAMS = {'engine': 'numpy', 'grid_size': 40, 'initial_prey': 400, 'initial_predators': 20, 'max_steps': 40}
+
+
+def test_resumed_records_and_overlay(tmp_path):
+    path = str(tmp_path / 'run.ckpt')
+    run_simulation({**PARAMS, 'max_steps': 15}, seed=5, checkpoint_path=path)
+    checkpoint = load(path)
+
+    instrumentation = Instrumentation()
+    resumed = run_simulation(PARAMS, checkpoint=checkpoint, instrumentation=instrumentation)
+    assert [record['step'] for record in instrumentation.records] == list(resumed.steps[1:])
+    assert instrumentation.record_at(15) is None
+    assert instrumentation.record_at(16)['step'] == 16
+    assert instrumentation.record_at(40)['step'] == 40
+
+    # The viewer shows history index i, which is step checkpoint.step + i of the run
+    instrumentation = Instrumentation()
+    world = checkpoint.restore()
+    history = History(world.grid_size, world.food.present)
+    history.append(world.frame(), world.stats())
+    for step in range(checkpoint.step + 1, checkpoint.step + 6):
+        stats = instrumentation.step(world, step)
+        history.append(world.frame(), stats)
+    viewer = SimulationViewer(history, world.grid_size, instrumentation=instrumentation, start_step=checkpoint.step)
+    viewer.current_step = 0
+    viewer.update_plot()
+    assert viewer.profile_text.get_text() == ''
+    viewer.current_step = 1
+    viewer.update_plot()
+    assert viewer.profile_text.get_text() == instrumentation.overlay_text(16) != ''
+    plt.close(viewer.fig)
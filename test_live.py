@@ -0,0 +1,46 @@
+"""A live run steps, records and stops exactly like a headless one, also when resumed"""
+import numpy as np
+
+from checkpoint import load
+from convergence import EQUILIBRIUM, ConvergenceDetector
+from headless import DEFAULT_PARAMS, run_simulation
+from history import SERIES, History
+from live import LiveRun
+from world import create_world
+
+PARAMS = {'engine': 'numpy', 'grid_size': 40, 'initial_prey': 400, 'initial_predators': 20, 'max_steps': 40}
+# Settles as soon as the window fills, so the early stop is easy to check
+LOOSE = {'window': 20, 'check_interval': 5, 'cv_threshold': 10.0, 'drift_threshold': 10.0, 'acf_threshold': 2.0}
+
+
+def _live(world, max_steps, **options):
+    history = History(world.grid_size, world.food.present)
+    run = LiveRun(world, max_steps, recorders=[history], **options)
+    run.start()
+    run.thread.join()
+    return run, history
+
+
+def test_resumed_live_run_matches_straight_run(tmp_path):
+    straight = run_simulation(PARAMS, seed=5)
+    path = str(tmp_path / 'run.ckpt')
+    run_simulation({**PARAMS, 'max_steps': 15}, seed=5, checkpoint_path=path)
+    checkpoint = load(path)
+
+    run, history = _live(checkpoint.restore(), PARAMS['max_steps'], start_step=checkpoint.step)
+    assert run.steps_done == straight.steps[-1]
+    assert len(history) == len(run) == len(straight) - 15
+    for name in SERIES:
+        np.testing.assert_array_equal(history.series[name], getattr(straight, name)[15:])
+    index, *_ = run.latest()
+    assert index == len(history) - 1
+
+
+def test_live_run_stops_on_convergence():
+    params = {name: value for name, value in {**DEFAULT_PARAMS, **PARAMS}.items() if name not in ('engine', 'max_steps')}
+    headless = run_simulation(PARAMS, seed=5, convergence=ConvergenceDetector(**LOOSE))
+    detector = ConvergenceDetector(**LOOSE)
+    run, history = _live(create_world('numpy', seed=5, **params), PARAMS['max_steps'], convergence=detector)
+    assert detector.regime == headless.regime == EQUILIBRIUM
+    assert run.steps_done == headless.steps[-1] < PARAMS['max_steps']
+    np.testing.assert_array_equal(history.series['prey_count'], headless.prey_count)
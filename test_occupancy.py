@@ -0,0 +1,71 @@
+"""Every engine keeps one agent per cell, with the occupancy grid in step with the agents"""
+import numpy as np
+import pytest
+
+from ensemble import EnsembleWorld
+from headless import DEFAULT_PARAMS
+from partitioned import PREDATOR, PREY
+from spatial import EMPTY
+from world import create_world
+
+# Crowded enough that moves and births keep competing for cells
+PARAMS = {**{name: value for name, value in DEFAULT_PARAMS.items() if name not in ('max_steps', 'engine')},
+          'grid_size': 30, 'initial_prey': 400, 'initial_predators': 25}
+STEPS = 25
+
+
+def _assert_unique(x, y, grid_size):
+    cells = np.asarray(y) * grid_size + np.asarray(x)
+    assert len(np.unique(cells)) == len(cells)
+
+
+@pytest.mark.parametrize('radius', [0, 3])
+def test_object_engine(radius):
+    world = create_world('object', seed=2, **{**PARAMS, 'perception_radius': radius})
+    for _ in range(STEPS):
+        world.step()
+        agents = world.prey_list + world.predator_list
+        _assert_unique([a.x for a in agents], [a.y for a in agents], world.grid_size)
+        for agent in agents:
+            assert world.occupancy.ids[agent.y, agent.x] == agent.uid
+            assert world.agents[agent.uid] is agent
+        assert np.count_nonzero(world.occupancy.ids != EMPTY) == len(agents) == len(world.agents)
+
+
+@pytest.mark.parametrize('radius', [0, 3])
+def test_numpy_engine(radius):
+    world = create_world('numpy', seed=2, **{**PARAMS, 'perception_radius': radius})
+    for _ in range(STEPS):
+        world.step()
+        x = np.concatenate([world.prey_x, world.predator_x])
+        y = np.concatenate([world.prey_y, world.predator_y])
+        _assert_unique(x, y, world.grid_size)
+        np.testing.assert_array_equal(world.ids[y, x], np.concatenate([world.prey_id, world.predator_id]))
+        assert np.count_nonzero(world.ids != EMPTY) == len(x)
+
+
+@pytest.mark.parametrize('radius', [0, 3])
+def test_ensemble_engine(radius):
+    world = EnsembleWorld(4, seed=2, **{**PARAMS, 'perception_radius': radius})
+    for _ in range(STEPS):
+        world.step()
+        r = np.concatenate([world.prey_r, world.predator_r])
+        x = np.concatenate([world.prey_x, world.predator_x])
+        y = np.concatenate([world.prey_y, world.predator_y])
+        _assert_unique(x + r * world.grid_size ** 2, y, world.grid_size)  # Distinct cells per replicate
+        np.testing.assert_array_equal(world.ids[r, y, x], np.concatenate([world.prey_id, world.predator_id]))
+        assert np.count_nonzero(world.ids != EMPTY) == len(x)
+
+
+def test_partitioned_engine():
+    with create_world('partitioned', seed=2, **PARAMS, tiles=3, processes=False) as world:
+        for _ in range(STEPS):
+            world.step()
+            prey_x, prey_y, _, predator_x, predator_y, _, _ = world.frame()
+            _assert_unique(np.concatenate([prey_x, predator_x]), np.concatenate([prey_y, predator_y]),
+                           world.grid_size)
+            assert (world.species[prey_y, prey_x] == PREY).all()
+            assert (world.species[predator_y, predator_x] == PREDATOR).all()
+            assert (world.ids[prey_y, prey_x] != EMPTY).all() and (world.ids[predator_y, predator_x] != EMPTY).all()
+            assert np.count_nonzero(world.ids != EMPTY) == len(prey_x) + len(predator_x)
+            assert np.count_nonzero(world.species) == len(prey_x) + len(predator_x)
@@ -0,0 +1,16 @@
+"""Worker processes change where the strips are stepped, not the result"""
+import numpy as np
+
+from headless import run_simulation
+from history import SERIES
+
+PARAMS = {'engine': 'partitioned', 'grid_size': 60, 'initial_prey': 500, 'initial_predators': 150,
+          'max_steps': 40, 'tiles': 3}
+
+
+def test_processes_match_in_process():
+    in_process = run_simulation({**PARAMS, 'processes': False}, seed=11)
+    workers = run_simulation({**PARAMS, 'processes': True}, seed=11)
+    assert len(workers) == len(in_process)
+    for name in SERIES:
+        np.testing.assert_array_equal(getattr(workers, name), getattr(in_process, name))
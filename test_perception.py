@@ -0,0 +1,95 @@
+"""Sensing steers predators towards prey and prey away from predators, and radius 0 leaves runs untouched"""
+import hashlib
+
+import numpy as np
+import pytest
+
+import numpy_world
+import world
+from ensemble import run_ensemble
+from headless import run_simulation
+from numpy_world import MOVES
+from perception import DensityField, agent_counts, climb, sense
+
+N = 40
+RADIUS = 5
+SOURCE = (20, 20)
+# Offsets from SOURCE within sensing range, along the axes and off them
+NEAR = [(dx, dy) for dx in range(-RADIUS, RADIUS + 1) for dy in range(-RADIUS, RADIUS + 1)
+        if (dx, dy) != (0, 0) and abs(dx) + abs(dy) <= RADIUS]
+
+
+def _distance(x, y):
+    dx = min((x - SOURCE[0]) % N, (SOURCE[0] - x) % N)
+    dy = min((y - SOURCE[1]) % N, (SOURCE[1] - y) % N)
+    return dx + dy
+
+
+def _field():
+    return DensityField(N, RADIUS, [SOURCE[0]], [SOURCE[1]])
+
+
+def test_predators_close_in_on_sensed_prey():
+    field = _field()
+    for dx, dy in NEAR:
+        x, y = SOURCE[0] + dx, SOURCE[1] + dy
+        step = field.uphill(x, y)
+        assert step is not None
+        assert _distance(x + step[0], y + step[1]) < _distance(x, y)
+
+
+def test_prey_back_away_from_sensed_predators():
+    field = _field()
+    for dx, dy in NEAR:
+        x, y = SOURCE[0] + dx, SOURCE[1] + dy
+        step = field.downhill(x, y)
+        assert step is not None
+        assert _distance(x + step[0], y + step[1]) > _distance(x, y)
+
+
+def test_nothing_is_sensed_out_of_range():
+    field = _field()
+    for x, y in [(SOURCE[0] + 2 * RADIUS, SOURCE[1]), (SOURCE[0], SOURCE[1] - 2 * RADIUS), (0, 0)]:
+        assert field.uphill(x, y) is None and field.downhill(x, y) is None
+
+
+def test_vectorized_engines_climb_the_same_way():
+    x = np.array([SOURCE[0] + dx for dx, _ in NEAR])
+    y = np.array([SOURCE[1] + dy for _, dy in NEAR])
+    density = sense(agent_counts(N, np.array([SOURCE[0]]), np.array([SOURCE[1]])), RADIUS)
+    field = _field()
+    for density_sign, expected in ((1, field.uphill), (-1, field.downhill)):
+        direction = climb(density_sign * density, x, y)
+        assert (direction >= 0).all()
+        assert [tuple(move) for move in MOVES[direction]] == [expected(*cell) for cell in zip(x, y)]
+
+
+def _digest(*series):
+    digest = hashlib.sha256()
+    for values in series:
+        digest.update(np.ascontiguousarray(values, dtype=np.int64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+PARAMS = {'grid_size': 30, 'initial_prey': 250, 'initial_predators': 30, 'max_steps': 60, 'perception_radius': 0}
+
+
+# Taken from the tree before the perception radius was added
+@pytest.mark.parametrize('engine, expected', [('object', '8797d86b1f42b0d9'), ('numpy', '46830d492365cc03')])
+def test_radius_zero_reproduces_runs_without_perception(engine, expected):
+    result = run_simulation({**PARAMS, 'engine': engine}, seed=7)
+    assert _digest(result.prey_count, result.predator_count, result.available_food) == expected
+
+
+@pytest.mark.parametrize('engine', ['object', 'numpy', 'ensemble'])
+def test_radius_zero_never_senses(engine, monkeypatch):
+    def unused(*args, **kwargs):
+        raise AssertionError("sensing ran with perception_radius=0")
+
+    monkeypatch.setattr(world, 'DensityField', unused)
+    monkeypatch.setattr(numpy_world, 'sense', unused)
+    monkeypatch.setattr(numpy_world, 'climb', unused)
+    if engine == 'ensemble':
+        run_ensemble(PARAMS, replicates=3, seed=7)
+    else:
+        run_simulation({**PARAMS, 'engine': engine}, seed=7)
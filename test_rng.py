@@ -0,0 +1,23 @@
+"""Same seed, same run: every engine is reproducible from its seed alone"""
+import numpy as np
+import pytest
+
+from headless import SERIES, run_simulation
+
+PARAMS = {'grid_size': 40, 'initial_prey': 400, 'initial_predators': 20, 'max_steps': 40}
+
+
+@pytest.mark.parametrize('engine', ['object', 'numpy'])
+def test_same_seed_same_result(engine):
+    first = run_simulation({**PARAMS, 'engine': engine}, seed=7)
+    second = run_simulation({**PARAMS, 'engine': engine}, seed=7)
+    np.testing.assert_array_equal(first.steps, second.steps)
+    for name in SERIES:
+        np.testing.assert_array_equal(getattr(first, name), getattr(second, name))
+
+
+@pytest.mark.parametrize('engine', ['object', 'numpy'])
+def test_other_seed_other_result(engine):
+    first = run_simulation({**PARAMS, 'engine': engine}, seed=7)
+    other = run_simulation({**PARAMS, 'engine': engine}, seed=8)
+    assert any(not np.array_equal(getattr(first, name), getattr(other, name)) for name in SERIES)
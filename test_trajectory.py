@@ -0,0 +1,36 @@
+"""Trajectory files replay a run exactly, also when the run was interrupted"""
+import numpy as np
+import pytest
+
+from headless import run_simulation
+from history import SERIES
+from instrumentation import Instrumentation
+from trajectory import Trajectory
+
+PARAMS = {'engine': 'numpy', 'grid_size': 40, 'initial_prey': 400, 'initial_predators': 20, 'max_steps': 30}
+
+
+def test_trajectory_matches_result(tmp_path):
+    path = str(tmp_path / 'run.traj')
+    result = run_simulation(PARAMS, seed=3, trajectory_path=path)
+    trajectory = Trajectory(path)
+    assert len(trajectory) == len(result)
+    for name in SERIES:
+        np.testing.assert_array_equal(trajectory.series[name], getattr(result, name))
+
+
+def test_interrupted_run_leaves_a_complete_trajectory(tmp_path):
+    def interrupt(step, world, stats, record):
+        if step == 10:
+            raise KeyboardInterrupt
+
+    path = str(tmp_path / 'run.traj')
+    # The traceback is kept alive like in an interactive session, so nothing is closed by garbage collection
+    with pytest.raises(KeyboardInterrupt) as interrupted:
+        run_simulation(PARAMS, seed=3, trajectory_path=path, instrumentation=Instrumentation([interrupt]))
+    assert interrupted.tb is not None
+    # Steps 0-9 were recorded before the interrupt, and every one of them reads back whole
+    trajectory = Trajectory(path)
+    assert len(trajectory) == 10
+    prey, predators, food, stats = trajectory[9]
+    assert len(prey) == stats['prey_count'] and len(predators) == stats['predator_count']
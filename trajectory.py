@@ -0,0 +1,145 @@
+import numpy as np
+
+from history import SERIES, SERIES_DTYPES, AgentFrame, FoodFrame
+
+MAGIC = b'KDSTRAJ\0'
+VERSION = 1
+
+# Fixed-width header in front of every step record, followed by the agent arrays and the food bitmap
+RECORD_HEADER = np.dtype([
+    ('prey_count', '<i4'),
+    ('predator_count', '<i4'),
+    ('avg_prey_energy', '<f8'),
+    ('avg_predator_energy', '<f8'),
+    ('available_food', '<i8'),
+])
+ENERGY_DTYPE = np.dtype('<i4')
+
+
+def _coord_dtype(grid_size):
+    return np.dtype('<u2') if grid_size <= np.iinfo(np.uint16).max + 1 else np.dtype('<i4')
+
+
+class TrajectoryWriter:
+    """Streams each simulation step to an on-disk trajectory file
+
+    The data file holds a header (grid size and food positions) followed by
+    one record per step; a sidecar ``<path>.idx`` file holds the byte offset
+    of every record so a reader can seek straight to any step.
+    """
+
+    def __init__(self, path, grid_size, food_present):
+        self.path = path
+        self.grid_size = grid_size
+        self.coord_dtype = _coord_dtype(grid_size)
+        self.data_file = open(path, 'wb')
+        self.index_file = open(path + '.idx', 'wb')
+
+        self.data_file.write(MAGIC)
+        self.data_file.write(np.array([VERSION, grid_size, self.coord_dtype.itemsize], dtype='<u4').tobytes())
+        self.data_file.write(np.packbits(food_present, axis=None).tobytes())
+
+    def append(self, frame, stats):
+        """Write one step from a world's frame() and stats(), same call as History.append"""
+        prey_x, prey_y, prey_energy, predator_x, predator_y, predator_energy, food_available = frame
+        header = np.zeros(1, dtype=RECORD_HEADER)
+        header['prey_count'] = len(prey_x)
+        header['predator_count'] = len(predator_x)
+        header['avg_prey_energy'] = stats['avg_prey_energy']
+        header['avg_predator_energy'] = stats['avg_predator_energy']
+        header['available_food'] = stats['available_food']
+
+        self.index_file.write(np.array([self.data_file.tell()], dtype='<i8').tobytes())
+        write = self.data_file.write
+        write(header.tobytes())
+        write(np.stack([prey_x, prey_y]).astype(self.coord_dtype).tobytes())
+        write(np.asarray(prey_energy).astype(ENERGY_DTYPE).tobytes())
+        write(np.stack([predator_x, predator_y]).astype(self.coord_dtype).tobytes())
+        write(np.asarray(predator_energy).astype(ENERGY_DTYPE).tobytes())
+        write(np.packbits(food_available, axis=None).tobytes())
+
+    def close(self):
+        self.data_file.close()
+        self.index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Trajectory:
+    """Read-only, memory-mapped view of a trajectory file
+
+    Only the records that are actually indexed get read from disk, so a
+    viewer can scrub through runs much larger than RAM. Indexing returns
+    the same (prey, predators, food, stats) tuple as History, and
+    ``series`` holds every step's statistics as whole-run arrays.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.data = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(self.data[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a simulation trajectory file")
+        version, grid_size, coord_size = np.frombuffer(self.data, dtype='<u4', count=3, offset=len(MAGIC))
+        if version != VERSION:
+            raise ValueError(f"Unsupported trajectory version {version} in {path}")
+        self.grid_size = int(grid_size)
+        self.coord_dtype = np.dtype('<u2') if coord_size == 2 else np.dtype('<i4')
+        self.food_bytes = (self.grid_size * self.grid_size + 7) // 8
+
+        food_offset = len(MAGIC) + 12
+        self.food_present = self._unpack_food(food_offset)
+        self.offsets = np.fromfile(path + '.idx', dtype='<i8')
+        self.series = self._read_series()
+
+    def _read_series(self):
+        """Every step's record header, gathered in one vectorized read"""
+        byte_index = self.offsets[:, None] + np.arange(RECORD_HEADER.itemsize)
+        headers = np.asarray(self.data[byte_index]).view(RECORD_HEADER).ravel()
+        return {name: headers[name].astype(SERIES_DTYPES[name]) for name in SERIES}
+
+    def _unpack_food(self, offset):
+        n = self.grid_size
+        bits = self.data[offset:offset + self.food_bytes]
+        return np.unpackbits(bits, count=n * n).reshape(n, n).astype(bool)
+
+    def _agents(self, offset, count):
+        coords = np.frombuffer(self.data, dtype=self.coord_dtype, count=2 * count, offset=offset).reshape(2, count)
+        offset += coords.nbytes
+        energy = np.frombuffer(self.data, dtype=ENERGY_DTYPE, count=count, offset=offset)
+        return AgentFrame(coords[0], coords[1], energy), offset + energy.nbytes
+
+    def stats_at(self, step):
+        """Stats dict of one step, without touching its agent arrays"""
+        header = np.frombuffer(self.data, dtype=RECORD_HEADER, count=1, offset=int(self.offsets[step]))[0]
+        return {
+            'prey_count': int(header['prey_count']),
+            'predator_count': int(header['predator_count']),
+            'avg_prey_energy': float(header['avg_prey_energy']),
+            'avg_predator_energy': float(header['avg_predator_energy']),
+            'available_food': int(header['available_food'])
+        }
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def frame_at(self, step):
+        """(prey, predators, food) of one step, reading only its header counts and agent arrays"""
+        offset = int(self.offsets[step])
+        header = np.frombuffer(self.data, dtype=RECORD_HEADER, count=1, offset=offset)[0]
+        offset += RECORD_HEADER.itemsize
+        prey, offset = self._agents(offset, int(header['prey_count']))
+        predators, offset = self._agents(offset, int(header['predator_count']))
+        return prey, predators, FoodFrame(self.food_present, self._unpack_food(offset))
+
+    def __getitem__(self, step):
+        if isinstance(step, slice):
+            return [self[i] for i in range(*step.indices(len(self)))]
+        return self.frame_at(step) + (self.stats_at(step),)
+
+    def __iter__(self):
+        for step in range(len(self)):
+            yield self[step]
@@ -0,0 +1,368 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.artist import Artist
+from matplotlib.widgets import Button
+from matplotlib.patches import Patch
+
+from render import PALETTE, render_indexed
+
+
+class FrameImage(Artist):
+    """A palette frame (see render_indexed) drawn straight onto the canvas pixels of its axes
+
+    AxesImage pushes the whole frame through matplotlib's generic
+    resampling pipeline on every draw, which on large grids costs more
+    than everything else in a blitted frame. This artist maps each canvas
+    pixel to its cell once per axes size, so a frame is only two gathers
+    (cells, then colours) and one draw_image.
+    """
+
+    def __init__(self, ax, grid_size):
+        super().__init__()
+        self.axes = ax
+        self.set_figure(ax.figure)
+        self.cells = np.zeros((grid_size, grid_size), dtype=np.uint8)
+        self.colors = np.concatenate([PALETTE, np.full((len(PALETTE), 1), 255, dtype=np.uint8)], axis=1)
+        self.pixel_cells = None
+
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        x0, y0, x1, y1 = np.round(self.axes.bbox.extents).astype(int)
+        width, height = x1 - x0, y1 - y0
+        if width <= 0 or height <= 0:
+            return
+        if self.pixel_cells is None or self.pixel_cells.shape != (height, width):
+            # Nearest cell of every pixel; draw_image puts the first row at the bottom, so the
+            # rows are reversed to keep cell row 0 at the top like imshow's default origin
+            n = len(self.cells)
+            rows = np.arange(height)[::-1] * n // height
+            self.pixel_cells = rows[:, None] * n + np.arange(width) * n // width
+        pixels = self.colors.take(self.cells.take(self.pixel_cells), axis=0)
+        gc = renderer.new_gc()
+        gc.set_clip_rectangle(self.axes.bbox)
+        renderer.draw_image(gc, x0, y0, pixels)
+        gc.restore()
+        self.stale = False
+
+
+class SimulationViewer:
+    def __init__(self, history, grid_size, interval=200, instrumentation=None, ensemble=None, start_step=0):
+        self.history = history
+        self.grid_size = grid_size
+        # Step number of the first recorded frame: runs resumed from a checkpoint start at its step
+        self.start_step = start_step
+        self.instrumentation = instrumentation
+        self.current_step = 0
+        self.max_step = len(history) - 1
+        
+        # Create figure and axis with better styling
+        self.fig, (self.ax_main, self.ax_stats) = plt.subplots(1, 2, figsize=(18, 10), 
+                                                              gridspec_kw={'width_ratios': [2, 1]})
+        # Maximize on Tk; other backends (Agg when benchmarking) have no such window
+        window = getattr(self.fig.canvas.manager, 'window', None)
+        if hasattr(window, 'state'):
+            window.state('zoomed')
+        plt.subplots_adjust(bottom=0.15, right=0.95, top=0.9)
+        
+        # Set figure background color
+        self.fig.patch.set_facecolor('lightblue')
+        
+        # Create navigation buttons
+        ax_prev = plt.axes([0.25, 0.02, 0.08, 0.04])
+        ax_next = plt.axes([0.34, 0.02, 0.08, 0.04])
+        ax_first = plt.axes([0.1, 0.02, 0.08, 0.04])
+        ax_last = plt.axes([0.55, 0.02, 0.08, 0.04])
+        ax_play = plt.axes([0.43, 0.02, 0.08, 0.04])
+        
+        self.btn_prev = Button(ax_prev, '<- Sebelumnya')
+        self.btn_next = Button(ax_next, 'Sesudah ->')
+        self.btn_first = Button(ax_first, '<< Pertama')
+        self.btn_last = Button(ax_last, 'Terakhir >>')
+        self.btn_play = Button(ax_play, '> Mulai')
+        
+        # Connect button events
+        self.btn_prev.on_clicked(self.prev_step)
+        self.btn_next.on_clicked(self.next_step)
+        self.btn_first.on_clicked(self.first_step)
+        self.btn_last.on_clicked(self.last_step)
+        self.btn_play.on_clicked(self.toggle_play)
+        
+        # Add keyboard navigation
+        self.fig.canvas.mpl_connect('key_press_event', self.on_key_press)
+        
+        # Animation state
+        self.playing = False
+        self.animation_timer = None
+        self.interval = interval
+
+        # Persistent artists, updated in place on every frame
+        self.image = FrameImage(self.ax_main, grid_size)
+        self.ax_main.add_artist(self.image)
+        self.ax_main.set_xlim(0, grid_size)
+        self.ax_main.set_ylim(grid_size, 0)
+        self.ax_main.set_aspect('equal')
+        self.ax_main.axis('off')
+        # The fixed title line and the legend are part of the blitted background; only the status line changes
+        self.ax_main.set_title('Simulasi Interaksi Predator-Mangsa dengan Sistem Energi',
+                               fontsize=12, fontweight='bold', pad=24)
+        self.title = self.ax_main.text(0.5, 1.01, '', transform=self.ax_main.transAxes,
+                                       ha='center', va='bottom', fontsize=11)
+
+        # Enhanced legend
+        legend_elements = [
+            Patch(facecolor='#1469C8', label='Laut'),
+            Patch(facecolor='#64C832', label='Makanan'),
+            Patch(facecolor='#32FF32', label='Mangsa'),
+            Patch(facecolor='#FF3232', label='Predator'),
+        ]
+        self.legend = self.ax_main.legend(handles=legend_elements, loc='center left', bbox_to_anchor=(1.02, 0.5),
+                                          fontsize=10, title="Legenda", title_fontsize=12)
+
+        # Statistics axis with fixed limits, so frames only touch the line data
+        self.prey_line, = self.ax_stats.plot([], [], 'g-', linewidth=2, label='Mangsa')
+        self.predator_line, = self.ax_stats.plot([], [], 'r-', linewidth=2, label='Predator')
+        peak = max(history.series['prey_count'].max(initial=0), history.series['predator_count'].max(initial=0))
+
+        # Optional ensemble bands (mean and 5-95 percentile range over replicates), static background
+        if ensemble is not None:
+            for name, color, label in (('prey_count', 'g', 'Mangsa'), ('predator_count', 'r', 'Predator')):
+                lower, mean, upper = ensemble.band(name)
+                self.ax_stats.fill_between(ensemble.steps, lower, upper, color=color, alpha=0.15,
+                                           label=f'{label} (5-95% ansambel)')
+                self.ax_stats.plot(ensemble.steps, mean, color=color, linestyle='--', linewidth=1,
+                                   label=f'{label} (rata-rata ansambel)')
+                peak = max(peak, upper.max(initial=0))
+        self.ax_stats.set_xlabel('Waktu')
+        self.ax_stats.set_ylabel('Populasi')
+        self.ax_stats.set_title('Dinamika Populasi')
+        self.ax_stats.legend()
+        self.ax_stats.grid(True, alpha=0.3)
+        self.steps = np.arange(start_step, start_step + len(history))
+        self.ax_stats.set_xlim(start_step, start_step + max(1, self.max_step))
+        self.ax_stats.set_ylim(0, max(1, peak * 1.05))
+        self.energy_text = self.ax_stats.text(0.02, 0.98, '', transform=self.ax_stats.transAxes,
+                                              verticalalignment='top', fontsize=10,
+                                              bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
+
+        self.animated_artists = [self.image, self.title, self.prey_line, self.predator_line, self.energy_text]
+
+        # Optional profiling overlay: phase timings and event counts of the shown step
+        if instrumentation is not None:
+            self.profile_text = self.ax_main.text(0.01, 0.99, '', transform=self.ax_main.transAxes,
+                                                  verticalalignment='top', fontsize=8, family='monospace',
+                                                  bbox=dict(boxstyle='round', facecolor='white', alpha=0.7))
+            self.animated_artists.append(self.profile_text)
+        for artist in self.animated_artists:
+            artist.set_animated(True)
+
+        # Blitting: keep a copy of the static background after every full redraw
+        self.background = None
+        self.fig.canvas.mpl_connect('draw_event', self.on_draw)
+
+        # Initial plot
+        self.update_plot()
+        self.fig.canvas.draw_idle()
+
+    def on_draw(self, event):
+        canvas = self.fig.canvas
+        if getattr(canvas, 'supports_blit', False):
+            self.background = canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_animated()
+
+    def draw_animated(self):
+        for artist in self.animated_artists:
+            self.fig.draw_artist(artist)
+
+    def redraw(self):
+        """Blit the animated artists over the cached background, or fall back to a full redraw"""
+        canvas = self.fig.canvas
+        if self.background is None:
+            canvas.draw_idle()
+            return
+        canvas.restore_region(self.background)
+        self.draw_animated()
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+    def update_plot(self):
+        if self.current_step >= len(self.history):
+            return
+        prey_list, predator_list, food_list, stats = self.history[self.current_step]
+        self.draw_step(self.current_step, prey_list, predator_list, food_list, stats)
+
+    def draw_step(self, step, prey_list, predator_list, food_list, stats):
+        # Rasterize the step straight into the persistent palette frame
+        render_indexed(self.grid_size, prey_list, predator_list, food_list, out=self.image.cells)
+
+        # Status line: time, counts and ecosystem status
+        total_animals = len(prey_list) + len(predator_list)
+        prey_percentage = (len(prey_list) / total_animals * 100) if total_animals > 0 else 0
+        predator_percentage = (len(predator_list) / total_animals * 100) if total_animals > 0 else 0
+
+        title = f"Waktu: {self.start_step + step + 1}/{self.start_step + len(self.history)} | "
+        title += f"Mangsa: {len(prey_list)} ({prey_percentage:.1f}%) | "
+        title += f"Predator: {len(predator_list)} ({predator_percentage:.1f}%) | "
+        title += f"Makanan: {food_list.available_count()}"
+        if len(prey_list) == 0:
+            title += " | ⚠️ Mangsa Punah"
+        elif len(predator_list) == 0:
+            title += " | ⚠️ Predator Punah"
+        self.title.set_text(title)
+
+        # Plot statistics: slices of the precomputed series, no per-frame walk over the history
+        end = step + 1
+        series = self.history.series
+        self.prey_line.set_data(self.steps[:end], series['prey_count'][:end])
+        self.predator_line.set_data(self.steps[:end], series['predator_count'][:end])
+
+        # Grow the y range when a new peak shows up (needs one full redraw)
+        peak = max(series['prey_count'][step], series['predator_count'][step])
+        if peak > self.ax_stats.get_ylim()[1]:
+            self.ax_stats.set_ylim(0, peak * 1.2)
+            self.background = None
+
+        # Add energy info to the plot
+        energy_text = f"Rata-rata Energi:\nMangsa: {stats['avg_prey_energy']:.1f}\nPredator: {stats['avg_predator_energy']:.1f}"
+        self.energy_text.set_text(energy_text)
+
+        if self.instrumentation is not None:
+            self.profile_text.set_text(self.instrumentation.overlay_text(self.start_step + step))
+
+        self.redraw()
+    
+    def prev_step(self, event):
+        if self.current_step > 0:
+            self.current_step -= 1
+            self.update_plot()
+    
+    def next_step(self, event):
+        if self.current_step < self.max_step:
+            self.current_step += 1
+            self.update_plot()
+    
+    def first_step(self, event):
+        self.current_step = 0
+        self.update_plot()
+    
+    def last_step(self, event):
+        self.current_step = self.max_step
+        self.update_plot()
+    
+    def toggle_play(self, event):
+        if self.playing:
+            self.stop_animation()
+        else:
+            self.start_animation()
+    
+    def start_animation(self):
+        self.playing = True
+        self.btn_play.label.set_text('|| Pause')
+        self.animate_step()
+    
+    def stop_animation(self):
+        self.playing = False
+        self.btn_play.label.set_text('> Play')
+        if self.animation_timer:
+            self.animation_timer.stop()
+            self.animation_timer = None
+    
+    def animate_step(self):
+        if self.playing and self.current_step < self.max_step:
+            self.current_step += 1
+            self.update_plot()
+            self.animation_timer = self.fig.canvas.new_timer(interval=self.interval)
+            self.animation_timer.single_shot = True
+            self.animation_timer.add_callback(self.animate_step)
+            self.animation_timer.start()
+        else:
+            self.stop_animation()
+    
+    def show(self):
+        plt.show()
+
+    def on_key_press(self, event):
+        if event.key == 'left':
+            self.prev_step(None)
+        elif event.key == 'right':
+            self.next_step(None)
+        elif event.key == 'home':
+            self.first_step(None)
+        elif event.key == 'end':
+            self.last_step(None)
+        elif event.key == ' ':
+            self.toggle_play(None)
+
+
+class LiveViewer(SimulationViewer):
+    """Viewer for a LiveRun: follows the newest frame while the simulation keeps running"""
+    def __init__(self, live, interval=50):
+        self.live = live
+        self.shown = None
+        super().__init__(live, live.grid_size, interval, live.instrumentation, start_step=live.start_step)
+        self.fig.canvas.mpl_connect('close_event', lambda event: live.stop())
+
+        # The run starts playing right away; the play button pauses the simulation itself
+        self.playing = True
+        self.btn_play.label.set_text('|| Pause')
+
+        self.poll_timer = self.fig.canvas.new_timer(interval=interval)
+        self.poll_timer.add_callback(self.poll)
+        live.start()
+        self.poll_timer.start()
+
+    def poll(self):
+        latest = self.live.latest()
+        if latest is not None:
+            self.shown = latest
+            self.current_step = latest[0]
+            self.update_plot()
+        if self.live.done:
+            self.poll_timer.stop()
+            self.playing = False
+            self.btn_play.label.set_text('Selesai')
+            self.fig.canvas.draw_idle()
+
+    def update_plot(self):
+        if self.shown is None:
+            self.shown = self.live.latest()
+        if self.shown is not None:
+            self.draw_step(*self.shown)
+
+    def toggle_play(self, event):
+        if self.live.done or self.live.stopped.is_set():
+            return
+        if self.live.paused:
+            self.live.resume()
+            self.playing = True
+            self.btn_play.label.set_text('|| Pause')
+        else:
+            self.live.pause()
+            self.playing = False
+            self.btn_play.label.set_text('> Lanjut')
+        self.fig.canvas.draw_idle()
+
+    def stop_run(self):
+        self.live.stop()
+        self.playing = False
+        self.btn_play.label.set_text('Berhenti')
+        self.fig.canvas.draw_idle()
+
+    # Only the newest frame is kept, so stepping through past frames is not available live
+    def prev_step(self, event):
+        pass
+
+    def next_step(self, event):
+        pass
+
+    def first_step(self, event):
+        pass
+
+    def last_step(self, event):
+        pass
+
+    def on_key_press(self, event):
+        if event.key == 'escape':
+            self.stop_run()
+        else:
+            super().on_key_press(event)
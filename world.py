@@ -0,0 +1,280 @@
+import numpy as np
+
+from agents import AgentPool, Prey, Predator, FoodField
+from perception import DensityField
+from rng import python_random
+from spatial import OccupancyGrid, check_capacity
+
+# Bump whenever a change alters what any engine produces for a given seed; cached results keyed on it go stale
+ENGINE_VERSION = 1
+
+
+class World:
+    """Base of every engine: a world can be closed, or used as a context manager that closes it"""
+
+    def close(self):
+        """Release the engine's resources; only engines with workers (PartitionedWorld) hold any"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ObjectWorld(World):
+    """Reference engine: every agent is a Python object stepped one at a time"""
+
+    engine = "object"
+
+    def __init__(self, grid_size, initial_prey, initial_predators, prey_reproduce_interval,
+                 predator_reproduce_interval, predator_initial_energy, energy_gain,
+                 energy_loss, food_density=0.1, seed=None, perception_radius=0):
+        self.grid_size = grid_size
+        self.perception_radius = perception_radius  # Sensing range in cells; 0 = neighbours only
+        self.prey_reproduce_interval = prey_reproduce_interval
+        self.predator_reproduce_interval = predator_reproduce_interval
+        self.energy_gain = energy_gain
+        self.energy_loss = energy_loss
+        # Every random draw of this world comes from its own stream
+        self.rng = python_random(seed)
+        rng = self.rng
+
+        # Create initial populations, one agent per cell
+        prey_xs, prey_ys, predator_xs, predator_ys = random_cells(rng, grid_size, initial_prey, initial_predators)
+        self.prey_list = [Prey(x, y, rng=rng) for x, y in zip(prey_xs, prey_ys)]
+        self.predator_list = [Predator(x, y, predator_initial_energy) for x, y in zip(predator_xs, predator_ys)]
+
+        # Create food sources, indexed by cell
+        num_food = int(grid_size * grid_size * food_density)
+        food_xs, food_ys = [], []
+        for _ in range(num_food):
+            food_xs.append(rng.randrange(grid_size))
+            food_ys.append(rng.randrange(grid_size))
+        self.food = FoodField(grid_size, food_xs, food_ys)
+
+        # Event counters, switched on by instrumentation.Instrumentation (None = no counting)
+        self.counters = None
+
+        # Dead agents are recycled for newborns instead of being garbage collected
+        self.prey_pool = AgentPool(Prey)
+        self.predator_pool = AgentPool(Predator)
+
+        # Occupancy grid of agent ids, plus the id -> agent lookup behind it
+        self.occupancy = OccupancyGrid(grid_size)
+        self.agents = {}
+        self.next_id = 0
+        for agent in self.prey_list + self.predator_list:
+            self._add(agent)
+
+        # The step is split into named phases so tools can time them individually
+        self.phases = [
+            ('food_regen', self._regenerate_food),
+            ('prey_pass', self._prey_pass),
+            ('food_consumption', self._consume_food),
+            ('predator_pass', self._predator_pass),
+        ]
+
+    def step(self):
+        for _, phase in self.phases:
+            phase()
+
+    def _regenerate_food(self):
+        self.food.step()
+
+    def _add(self, agent):
+        """Give a new (or recycled) agent a fresh id and lock its cell"""
+        agent.uid = self.next_id
+        self.next_id += 1
+        self.agents[agent.uid] = agent
+        self.occupancy.place(agent.uid, agent.x, agent.y)
+
+    def _remove(self, agent):
+        """Drop a dead agent's id and free its cell, unless a predator already took it over"""
+        del self.agents[agent.uid]
+        if self.occupancy.occupant(agent.x, agent.y) == agent.uid:
+            self.occupancy.vacate(agent.x, agent.y)
+
+    def _compact(self, agents, pool):
+        """Living agents of a list; the dead go back to the pool only now, so none is reused mid-pass"""
+        alive = []
+        for agent in agents:
+            if agent.is_alive():
+                alive.append(agent)
+            else:
+                pool.release(agent)
+        return alive
+
+    def _prey_pass(self):
+        grid_size = self.grid_size
+        occupancy = self.occupancy
+
+        # Prey sense the predators as they stood at the start of the pass
+        predators = None
+        if self.perception_radius:
+            predators = DensityField(grid_size, self.perception_radius,
+                                     [p.x for p in self.predator_list], [p.y for p in self.predator_list])
+
+        # Prey actions with energy system; each move and birth claims its cell right away
+        new_prey = []
+        for prey in self.prey_list:
+            child = prey.step(grid_size, self.prey_reproduce_interval, occupancy, self.food,
+                              rng=self.rng, pool=self.prey_pool, predators=predators)
+            if child:
+                self._add(child)
+                new_prey.append(child)
+            # Remove dead prey (those with no energy), freeing their cell
+            if not prey.is_alive():
+                self._remove(prey)
+
+        prey_list = self._compact(self.prey_list, self.prey_pool)
+        if self.counters is not None:
+            self.counters['prey_births'] += len(new_prey)
+            self.counters['prey_deaths'] += len(self.prey_list) - len(prey_list)
+        prey_list.extend(new_prey)
+        self.prey_list = prey_list
+
+    def _consume_food(self):
+        # Consume food where prey are located
+        consumed = 0
+        for prey in self.prey_list:
+            consumed += self.food.consume(prey.x, prey.y)
+        if self.counters is not None:
+            self.counters['food_consumed'] += consumed
+
+    def _predator_pass(self):
+        grid_size = self.grid_size
+        occupancy = self.occupancy
+
+        # Predators sense the prey as they stood at the start of the pass
+        prey_field = None
+        if self.perception_radius:
+            prey_field = DensityField(grid_size, self.perception_radius,
+                                      [p.x for p in self.prey_list], [p.y for p in self.prey_list])
+
+        # Predator actions: a hunting predator moves into its prey's cell
+        new_predators = []
+        for predator in self.predator_list:
+            child, eaten = predator.step(grid_size, occupancy, self.agents, self.energy_gain, self.energy_loss,
+                                         self.predator_reproduce_interval, rng=self.rng, pool=self.predator_pool,
+                                         counters=self.counters, prey_field=prey_field)
+            if eaten is not None:
+                eaten.energy = 0  # Marks it for the compaction below
+                self._remove(eaten)
+            if child:
+                self._add(child)
+                new_predators.append(child)
+            if not predator.is_alive():
+                self._remove(predator)
+
+        # Remove eaten prey and dead predators in one compaction pass each
+        prey_list = self._compact(self.prey_list, self.prey_pool)
+        predator_list = self._compact(self.predator_list, self.predator_pool)
+        if self.counters is not None:
+            self.counters['kills'] += len(self.prey_list) - len(prey_list)
+            self.counters['predator_births'] += len(new_predators)
+            self.counters['predator_deaths'] += len(self.predator_list) - len(predator_list)
+        self.prey_list = prey_list
+        predator_list.extend(new_predators)
+        self.predator_list = predator_list
+
+    def stats(self):
+        prey_list, predator_list = self.prey_list, self.predator_list
+        return {
+            'prey_count': len(prey_list),
+            'predator_count': len(predator_list),
+            'avg_prey_energy': sum(p.energy for p in prey_list) / len(prey_list) if prey_list else 0,
+            'avg_predator_energy': sum(p.energy for p in predator_list) / len(predator_list) if predator_list else 0,
+            'available_food': self.food.available_count()
+        }
+
+    def snapshot(self):
+        """Everything that changes while stepping, for checkpoint.save (arrays plus JSON-able values)
+
+        Agents are stored in list order, which decides the order of their
+        random draws. Ids and pooled agents only affect identity, not
+        results, so they are rebuilt on restore.
+        """
+        version, internal, gauss_next = self.rng.getstate()
+        return {
+            'prey': _agent_table(self.prey_list),
+            'predators': _agent_table(self.predator_list),
+            'food_present': self.food.present,
+            'food_timer': self.food.time_until_regen,
+            'rng_state': np.array(internal, dtype=np.int64),
+            'rng_version': version,
+            'rng_gauss_next': gauss_next,
+        }
+
+    def restore(self, state):
+        """Replace the dynamic state with a snapshot()'s"""
+        self.prey_list = [_restored_agent(Prey, *row) for row in state['prey'].tolist()]
+        self.predator_list = [_restored_agent(Predator, *row) for row in state['predators'].tolist()]
+        self.food.present = state['food_present'].copy()
+        self.food.time_until_regen = state['food_timer'].copy()
+        self.rng.setstate((state['rng_version'], tuple(state['rng_state'].tolist()), state['rng_gauss_next']))
+
+        self.prey_pool = AgentPool(Prey)
+        self.predator_pool = AgentPool(Predator)
+        self.occupancy = OccupancyGrid(self.grid_size)
+        self.agents = {}
+        self.next_id = 0
+        for agent in self.prey_list + self.predator_list:
+            self._add(agent)
+
+    def reseed(self, seed):
+        """Continue with a fresh random stream, e.g. to fork several runs from one checkpoint"""
+        self.rng = python_random(seed)
+
+    def frame(self):
+        """Agent coordinate/energy arrays and the food availability grid, for History.append"""
+        prey_list, predator_list = self.prey_list, self.predator_list
+        return (np.array([p.x for p in prey_list], dtype=np.int64),
+                np.array([p.y for p in prey_list], dtype=np.int64),
+                np.array([p.energy for p in prey_list], dtype=np.int64),
+                np.array([p.x for p in predator_list], dtype=np.int64),
+                np.array([p.y for p in predator_list], dtype=np.int64),
+                np.array([p.energy for p in predator_list], dtype=np.int64),
+                self.food.available())
+
+
+def _agent_table(agents):
+    """(x, y, energy, steps_since_reproduce) row per agent"""
+    table = np.array([(a.x, a.y, a.energy, a.steps_since_reproduce) for a in agents], dtype=np.int64)
+    return table.reshape(len(agents), 4)
+
+
+def _restored_agent(cls, x, y, energy, steps_since_reproduce):
+    agent = cls(x, y, energy)
+    agent.steps_since_reproduce = steps_since_reproduce
+    return agent
+
+
+def random_cells(rng, grid_size, *counts):
+    """Distinct random cells for each group of agents, as (xs, ys) per group"""
+    total = sum(counts)
+    check_capacity(grid_size, total)
+    cells = rng.sample(range(grid_size * grid_size), total)
+    groups = []
+    start = 0
+    for count in counts:
+        group = cells[start:start + count]
+        groups += [[cell % grid_size for cell in group], [cell // grid_size for cell in group]]
+        start += count
+    return groups
+
+
+def create_world(engine="object", seed=None, **params):
+    """Build the simulation state for the requested engine ("object", "numpy" or "partitioned")
+
+    seed may be an int, None or a SeedSequence (see rng.spawn for parallel replicates).
+    """
+    if engine == "object":
+        return ObjectWorld(seed=seed, **params)
+    if engine == "numpy":
+        from numpy_world import NumpyWorld
+        return NumpyWorld(seed=seed, **params)
+    if engine == "partitioned":
+        from partitioned import PartitionedWorld
+        return PartitionedWorld(seed=seed, **params)
+    raise ValueError(f"Unknown simulation engine: {engine!r}")